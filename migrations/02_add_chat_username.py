@@ -0,0 +1,26 @@
+import sys
+
+sys.path.insert(1, 'tgbot')
+
+from loguru import logger  # noqa: E402
+from tortoise import Tortoise, run_async  # noqa: E402
+from tortoise.exceptions import OperationalError  # noqa: E402
+
+from config import load_config  # noqa: E402
+from models.db.db import db_init  # noqa: E402
+
+
+async def add_chat_username() -> None:
+    await db_init(load_config())
+    connection = Tortoise.get_connection("tg_db")
+    try:
+        await connection.execute_script(
+            "ALTER TABLE chats ADD COLUMN username VARCHAR(32) NULL"
+        )
+    except OperationalError as e:
+        # Колонка уже есть, если бд создана после ее добавления
+        logger.info("Column chats.username not added: {e}", e=e)
+
+
+if __name__ == "__main__":
+    run_async(add_chat_username())
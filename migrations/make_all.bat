@@ -1,2 +1,3 @@
 python "migrations\01_initialize_database.py"
+python "migrations\02_add_chat_username.py"
 exit
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+
+Общие настройки тестов.
+Модули бота импортируются относительно каталога tgbot, как при запуске бота.
+
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from tortoise import Tortoise
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tgbot"))
+os.environ.setdefault("BOT_TOKEN", "123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA")
+
+
+async def init_db() -> None:
+    """
+    Подключение бд в памяти со схемой всех моделей.
+    """
+    from models.db.logging_db import __models__ as logging_models
+    from models.db.tg_db import __models__ as tg_models
+
+    await Tortoise.init(
+        {
+            "connections": {
+                "tg_db": "sqlite://:memory:",
+                "logging_db": "sqlite://:memory:",
+            },
+            "apps": {
+                "tg": {"models": tg_models, "default_connection": "tg_db"},
+                "logging": {
+                    "models": logging_models,
+                    "default_connection": "logging_db",
+                },
+            },
+        }
+    )
+    await Tortoise.generate_schemas()
+
+
+@pytest.fixture
+def run_with_db():
+    """
+    :return: Функция, выполняющая корутину с подключенной бд.
+    """
+
+    def run(func):
+        async def main():
+            await init_db()
+            try:
+                return await func()
+            finally:
+                await Tortoise.close_connections()
+
+        return asyncio.run(main())
+
+    return run
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark", action="store_true", help="Запустить замеры производительности"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: замер производительности")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="Замеры запускаются с опцией --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
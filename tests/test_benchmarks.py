@@ -0,0 +1,168 @@
+"""
+
+Замеры производительности.
+Не запускаются по умолчанию: python -m pytest tests/test_benchmarks.py -s --benchmark
+
+"""
+
+import asyncio
+import time
+
+import pytest
+
+
+def report(name: str, count: int, seconds: float) -> None:
+    print(f"\n{name}: {seconds / count * 1e6:.2f} us")
+
+
+@pytest.mark.benchmark
+def test_trace_logging():
+    """
+    Разбор параметров с включенным и выключенным TRACE:
+    прежнее сообщение с разметкой, собираемое при каждом вызове,
+    против проверки уровня и шаблона без разметки.
+    """
+    import re
+
+    from loguru import logger
+    from test_handler_params import make_message, typed
+
+    from utils.logger import _update_trace_enabled
+
+    parser = typed.__wrapped__.__dict__["parser"]
+    # Прежнее экранирование не справлялось с закрывающими тегами в значениях
+    message = make_message("/typed 1 2.5 word the rest")
+    count = 20000
+
+    def safe_text(text: str) -> str:
+        return re.sub(r"<(?P<obj>\S*)>", r"\<\g<obj>>", text)
+
+    def old_trace(params: dict) -> None:
+        fields = ", ".join(
+            f"<lr>{key}</lr>=<ly>{safe_text(str(value))}</ly>"
+            for key, value in params.items()
+        )
+        logger.opt(colors=True).trace(
+            f"Making params for handler <e>{parser.handler_name}</e> "
+            f"finished: {{{fields}}}"
+        )
+
+    async def old_parse():
+        # Сообщение собирается без проверки уровня, сам разбор не логирует
+        _update_trace_enabled("INFO")
+        started = time.perf_counter()
+        for _ in range(count):
+            old_trace(await parser.parse(message))
+        return time.perf_counter() - started
+
+    async def new_parse(level: str):
+        _update_trace_enabled(level)
+        started = time.perf_counter()
+        for _ in range(count):
+            await parser.parse(message)
+        return time.perf_counter() - started
+
+    try:
+        for level in ("TRACE", "INFO"):
+            sink_id = logger.add(lambda _: None, level=level, colorize=True)
+            try:
+                old = asyncio.run(old_parse())
+                new = asyncio.run(new_parse(level))
+                report(f"old parse with {level} level", count, old)
+                report(f"new parse with {level} level", count, new)
+            finally:
+                logger.remove(sink_id)
+    finally:
+        _update_trace_enabled("TRACE")
+
+
+@pytest.mark.benchmark
+def test_handler_params():
+    """
+    Скомпилированный план разбора против асинхронного вызова каждого катера.
+    """
+    from test_handler_params import make_message, typed
+
+    from utils.args_cursor import ArgsCursor
+    from utils.logger import _update_trace_enabled
+
+    _update_trace_enabled("INFO")
+    parser = typed.__wrapped__.__dict__["parser"]
+    message = make_message("/typed 1 2.5 word the rest")
+    count = 20000
+
+    async def cutter_loop():
+        params = {}
+        args = ArgsCursor.from_text(message.get_args())
+        for step in parser._steps:
+            result = await step.cutter.get(message, args)
+            args = result.new_args
+            params[step.param_name] = result.value
+        return params
+
+    async def main():
+        started = time.perf_counter()
+        for _ in range(count):
+            await cutter_loop()
+        report("async cutters", count, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(count):
+            await parser.parse(message)
+        report("compiled parser", count, time.perf_counter() - started)
+
+    try:
+        asyncio.run(main())
+    finally:
+        _update_trace_enabled("TRACE")
+
+
+@pytest.mark.benchmark
+def test_lock_factory():
+    """
+    Блокировка свободного ключа и ключа, который ждут другие задачи.
+    """
+    from utils.lock_factory import LockFactory
+
+    factory = LockFactory()
+    count = 20000
+
+    async def hold(key: int):
+        async with factory.get_lock(key):
+            await asyncio.sleep(0)
+
+    async def main():
+        started = time.perf_counter()
+        for key in range(count):
+            async with factory.get_lock(key):
+                pass
+        report("uncontended lock", count, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(hold(key % 10) for key in range(count)))
+        report("contended lock", count, time.perf_counter() - started)
+
+    asyncio.run(main())
+    assert len(factory) == 0
+
+
+@pytest.mark.benchmark
+def test_rate_limiter():
+    """
+    Проверка вызова для одного ключа и для постоянно новых ключей.
+    """
+    from utils.gcra import RateLimiter
+
+    limiter = RateLimiter(maxsize=10000)
+    count = 100000
+
+    started = time.perf_counter()
+    for _ in range(count):
+        limiter.hit("key", interval=1, burst=3)
+    report("hit same key", count, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for key in range(count):
+        limiter.hit(key, interval=1)
+    report("hit new keys", count, time.perf_counter() - started)
+    assert len(limiter) <= 10000
@@ -0,0 +1,144 @@
+import asyncio
+
+from aiogram import Bot, types
+
+from utils.command_index import IndexedHandler
+from utils.update_queue import SchedulingDispatcher
+
+
+def make_update(text: str, edited: bool = False) -> types.Update:
+    message = {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 1, "is_bot": False, "first_name": "user"},
+        "text": text,
+    }
+    if text.startswith("/"):
+        command = text.split()[0]
+        message["entities"] = [
+            {"type": "bot_command", "offset": 0, "length": len(command)}
+        ]
+    return types.Update(
+        update_id=1, **{"edited_message" if edited else "message": message}
+    )
+
+
+def make_empty_dispatcher() -> SchedulingDispatcher:
+    bot = Bot("123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA")
+    # Имя бота для проверки упоминания в команде без запроса к телеграму
+    bot._me = types.User(id=123456, is_bot=True, first_name="bot", username="testbot")
+    Bot.set_current(bot)
+    return SchedulingDispatcher(bot)
+
+
+def make_dispatcher() -> SchedulingDispatcher:
+    dp = make_empty_dispatcher()
+
+    @dp.message_handler(commands=["ban", "b"])
+    async def ban(_: types.Message):
+        return "ban"
+
+    @dp.message_handler(commands="ping", commands_prefix="!/")
+    async def ping(_: types.Message):
+        return "ping"
+
+    @dp.message_handler(commands="start")
+    async def start(_: types.Message):
+        return "start"
+
+    @dp.message_handler()
+    async def text(_: types.Message):
+        return "text"
+
+    return dp
+
+
+def route(dp: SchedulingDispatcher, text: str, edited: bool = False) -> list[str]:
+    """
+    :return: Ответы обработчиков, получивших событие.
+    """
+    return asyncio.run(dp.process_update(make_update(text, edited)))
+
+
+def test_message_handlers_are_indexed():
+    dp = make_dispatcher()
+    assert isinstance(dp.message_handlers, IndexedHandler)
+    assert isinstance(dp.edited_message_handlers, IndexedHandler)
+    # Список обработчиков не зависит от текущего сообщения
+    assert len(dp.message_handlers.handlers) == 4
+
+
+def test_aliases():
+    dp = make_dispatcher()
+    assert route(dp, "/ban spam") == ["ban"]
+    assert route(dp, "/b spam") == ["ban"]
+    assert route(dp, "/BAN") == ["ban"]
+
+
+def test_mention():
+    dp = make_dispatcher()
+    assert route(dp, "/start@testbot") == ["start"]
+    # Команда другому боту проходит мимо обработчика команды
+    assert route(dp, "/start@otherbot") == ["text"]
+
+
+def test_commands_prefix():
+    dp = make_dispatcher()
+    assert route(dp, "!ping") == ["ping"]
+    assert route(dp, "/ping") == ["ping"]
+    assert route(dp, "!start") == ["text"]
+
+
+def test_text_skips_command_handlers():
+    dp = make_empty_dispatcher()
+    checked = []
+
+    @dp.message_handler(lambda message: checked.append(message) or True, commands="x")
+    async def command(_: types.Message):
+        return "x"
+
+    @dp.message_handler()
+    async def text(_: types.Message):
+        return "text"
+
+    assert route(dp, "hello") == ["text"]
+    assert route(dp, "/unknown") == ["text"]
+    assert checked == []
+    assert route(dp, "/x") == ["x"]
+    assert len(checked) == 1
+
+
+def test_registration_order_is_kept():
+    dp = make_empty_dispatcher()
+
+    @dp.message_handler(lambda message: "spam" in message.text)
+    async def spam(_: types.Message):
+        return "spam"
+
+    @dp.message_handler(commands="ban")
+    async def ban(_: types.Message):
+        return "ban"
+
+    # Обработчик без команды, зарегистрированный раньше, проверяется первым
+    assert route(dp, "/ban spam") == ["spam"]
+    assert route(dp, "/ban user") == ["ban"]
+
+
+def test_unregister():
+    dp = make_dispatcher()
+    assert route(dp, "/ban") == ["ban"]
+    ban = dp.message_handlers.handlers[0].handler
+    dp.message_handlers.unregister(ban)
+    assert route(dp, "/ban") == ["text"]
+
+
+def test_edited_message():
+    dp = make_dispatcher()
+
+    @dp.edited_message_handler(commands="edit")
+    async def edit(_: types.Message):
+        return "edit"
+
+    assert route(dp, "/edit", edited=True) == ["edit"]
+    assert route(dp, "text", edited=True) == []
@@ -0,0 +1,103 @@
+import pytest
+from aiogram import types
+from aiogram.dispatcher.handler import ctx_data, current_handler
+
+from middlewares.db_middleware import DBMiddleware
+from models.db import User
+from utils.exceptions import InvalidArgumentsError
+from utils.handler_params import command_handler
+from utils.handler_params.command_handler import make_handler_params
+from utils.lazy import Lazy
+
+ALICE = dict(id=10, is_bot=False, first_name="Alice", username="alice")
+BOB = dict(id=20, is_bot=False, first_name="Bob", username="bob")
+CHAT = dict(id=-100, type="supergroup", title="chat")
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    # Записи кэша привязаны к бд предыдущего теста
+    User.cache.clear()
+    yield
+    User.cache.clear()
+
+
+def make_message(text: str, sender: dict, reply_to: dict | None = None):
+    command = text.split()[0]
+    entities = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    if (offset := text.find("@")) != -1:
+        length = len(text[offset:].split()[0])
+        entities.append({"type": "mention", "offset": offset, "length": length})
+    message = dict(
+        message_id=2,
+        date=0,
+        chat=CHAT,
+        text=text,
+        entities=entities,
+    )
+    message["from"] = sender
+    if reply_to is not None:
+        message["reply_to_message"] = {
+            "message_id": 1,
+            "date": 0,
+            "chat": CHAT,
+            "from": reply_to,
+            "text": "hi",
+        }
+    return types.Message(**message)
+
+
+@command_handler
+async def ban(sender: User, target: User):
+    ...
+
+
+async def parse(message: types.Message) -> dict:
+    """
+    Разбор параметров с контекстом, который подготовил DBMiddleware.
+    """
+    data = {}
+    DBMiddleware().setup_chat(data, message.from_user, message.chat)
+    assert isinstance(data["user"], Lazy) and not data["user"].resolved
+    ctx_data.set(data)
+    current_handler.set(ban)
+    return await make_handler_params(ban, message)
+
+
+def test_mention_resolves_known_user(run_with_db):
+    async def main():
+        # Alice записана в бд, когда ее запись понадобилась обработчику
+        alice = (await parse(make_message("/ban", ALICE, reply_to=BOB)))["sender"]
+        params = await parse(make_message("/ban @alice", BOB))
+        return alice, params
+
+    alice, params = run_with_db(main)
+    assert params["target"].pk == alice.pk
+    assert params["target"].user_id == ALICE["id"]
+    assert params["sender"].user_id == BOB["id"]
+
+
+def test_mention_of_unknown_user(run_with_db):
+    async def main():
+        with pytest.raises(InvalidArgumentsError):
+            await parse(make_message("/ban @alice", BOB))
+        # Ленивая запись отправителя не создает запись упомянутого
+        return await User.filter(username="alice").exists()
+
+    assert run_with_db(main) is False
+
+
+def test_reply_resolves_user_row(run_with_db):
+    async def main():
+        first = await parse(make_message("/ban", BOB, reply_to=ALICE))
+        # Повторный ответ без кэша находит ту же запись
+        User.cache.clear()
+        second = await parse(make_message("/ban", BOB, reply_to=ALICE))
+        return first, second, await User.filter(user_id=ALICE["id"]).count()
+
+    first, second, count = run_with_db(main)
+    assert first["target"].user_id == ALICE["id"]
+    assert first["target"].username == "alice"
+    assert second["target"].pk == first["target"].pk
+    assert count == 1
+
@@ -0,0 +1,93 @@
+import pytest
+
+from utils import gcra
+from utils.gcra import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(gcra.time, "monotonic", clock)
+    return clock
+
+
+def test_interval(clock):
+    limiter = RateLimiter()
+    assert limiter.hit("key", interval=2).allowed
+
+    clock.now += 0.5
+    result = limiter.hit("key", interval=2)
+    assert not result.allowed
+    assert result.retry_after == pytest.approx(1.5)
+    assert result.exceeded == 1
+
+    clock.now += 1.5
+    assert limiter.hit("key", interval=2).allowed
+
+
+def test_burst(clock):
+    limiter = RateLimiter()
+    results = [limiter.hit("key", interval=1, burst=3) for _ in range(5)]
+    assert [result.allowed for result in results] == [True, True, True, False, False]
+    assert [result.exceeded for result in results] == [0, 0, 0, 1, 2]
+    assert results[3].retry_after == pytest.approx(1)
+
+    # За интервал восстанавливается один вызов
+    clock.now += 1
+    assert limiter.hit("key", interval=1, burst=3).allowed
+    assert not limiter.hit("key", interval=1, burst=3).allowed
+
+
+def test_exceeded_resets_after_allowed_call(clock):
+    limiter = RateLimiter()
+    limiter.hit("key", interval=1)
+    limiter.hit("key", interval=1)
+    limiter.hit("key", interval=1)
+    assert limiter.exceeded("key") == 2
+
+    clock.now += 1
+    assert limiter.hit("key", interval=1).allowed
+    assert limiter.exceeded("key") == 0
+    assert limiter.stats()["allowed"] == 2
+    assert limiter.stats()["throttled"] == 2
+
+
+def test_keys_are_independent(clock):
+    limiter = RateLimiter()
+    assert limiter.hit("a", interval=10).allowed
+    assert limiter.hit("b", interval=10).allowed
+    assert not limiter.hit("a", interval=10).allowed
+    limiter.reset("a")
+    assert limiter.hit("a", interval=10).allowed
+
+
+def test_expired_keys_are_removed(clock):
+    limiter = RateLimiter()
+    for key in range(100):
+        limiter.hit(key, interval=1)
+    assert len(limiter) == 100
+
+    # Каждый вызов удаляет несколько устаревших ключей
+    clock.now += 1
+    for _ in range(100 // gcra.EXPIRE_PER_CALL):
+        limiter.hit("key", interval=1)
+    assert len(limiter) == 1
+    assert limiter.stats()["expired"] == 100
+
+
+def test_maxsize(clock):
+    limiter = RateLimiter(maxsize=10)
+    for key in range(100):
+        limiter.hit(key, interval=60)
+    assert len(limiter) == 10
+    # Вытеснены давно использованные ключи
+    assert limiter.hit(0, interval=60).allowed
+    assert not limiter.hit(99, interval=60).allowed
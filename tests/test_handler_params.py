@@ -0,0 +1,141 @@
+import asyncio
+import random
+import typing as ty
+from datetime import timedelta
+
+import pytest
+from aiogram import types
+from aiogram.dispatcher.handler import current_handler
+
+from utils.args_cursor import ArgsCursor
+from utils.exceptions import InvalidArgumentsError, ParamsError
+from utils.handler_params import Param, command_handler
+from utils.handler_params.base import CutterParsingFailure, SyncCutter
+from utils.handler_params.command_handler import make_handler_params
+from utils.handler_params.cutters import (
+    FloatCutter,
+    IntegerCutter,
+    LiteralCutter,
+    OptionalCutter,
+    StringCutter,
+    Timedelta,
+    UnionCutter,
+    WordCutter,
+)
+
+
+def make_message(text: str) -> types.Message:
+    command = text.split()[0]
+    return types.Message(
+        message_id=1,
+        date=0,
+        chat={"id": 1, "type": "private"},
+        text=text,
+        entities=[{"type": "bot_command", "offset": 0, "length": len(command)}],
+    )
+
+
+def parse(handler, text: str) -> dict[str, ty.Any]:
+    async def main():
+        # Обработчик устанавливается диспетчером перед вызовом
+        current_handler.set(handler)
+        return await make_handler_params(handler, make_message(text))
+
+    return asyncio.run(main())
+
+
+@command_handler
+async def typed(num: int, ratio: float, word: str, *, rest: str):
+    ...
+
+
+@command_handler
+async def optional(mode: ty.Literal["on", "off"], count: int | None = None):
+    ...
+
+
+@command_handler
+async def union(value: int | float, duration: Timedelta | None = None):
+    ...
+
+
+@command_handler
+async def with_default(word: str = Param(name="слово", default_factory=lambda: "x")):
+    ...
+
+
+def test_typed_params():
+    assert parse(typed, "/typed 1 2.5 word the rest") == dict(
+        num=1, ratio=2.5, word="word", rest="the rest"
+    )
+
+
+def test_optional_params():
+    assert parse(optional, "/optional on") == dict(mode="on", count=None)
+    assert parse(optional, "/optional off 3") == dict(mode="off", count=3)
+
+
+def test_union_and_timedelta():
+    assert parse(union, "/union 2") == dict(value=2, duration=None)
+    assert parse(union, "/union 2.5 1h 30m") == dict(
+        value=2.5, duration=timedelta(hours=1, minutes=30)
+    )
+
+
+def test_default_factory():
+    assert parse(with_default, "/with_default") == dict(word="x")
+    assert parse(with_default, "/with_default y") == dict(word="y")
+
+
+@pytest.mark.parametrize(
+    "handler, text",
+    [
+        (typed, "/typed x 2.5 word rest"),  # Не число
+        (typed, "/typed 1 2.5 word"),  # Не передан обязательный аргумент
+        (optional, "/optional maybe"),  # Значение не из Literal
+        (optional, "/optional on 1 2"),  # Лишний аргумент
+        (union, "/union word"),  # Ни один тип не подошел
+    ],
+)
+def test_invalid_arguments(handler, text):
+    with pytest.raises(InvalidArgumentsError):
+        parse(handler, text)
+
+
+SYNC_CUTTERS = [
+    IntegerCutter(),
+    FloatCutter(),
+    WordCutter(),
+    StringCutter(),
+    LiteralCutter("on", "off"),
+    Timedelta(),
+    OptionalCutter(IntegerCutter(), default=0),
+    UnionCutter(IntegerCutter(), LiteralCutter("on")),
+    OptionalCutter(UnionCutter(FloatCutter(), Timedelta())),
+]
+WORDS = ["1", "-2", "2.5", "nan", "on", "off", "word", "1h", "30m", "2d", "1x", "h"]
+
+
+async def get(cutter: SyncCutter, args: ArgsCursor):
+    try:
+        return await cutter.get(None, args)
+    except ParamsError:
+        return None
+
+
+@pytest.mark.parametrize("cutter", SYNC_CUTTERS, ids=repr)
+def test_parse_matches_get(cutter):
+    """
+    Синхронный разбор дает тот же результат, что и асинхронный вызов катера.
+    """
+    rnd = random.Random(0)
+    for _ in range(500):
+        args = ArgsCursor(rnd.choices(WORDS, k=rnd.randint(0, 4)))
+        parsed = cutter.parse(None, args)
+        got = asyncio.run(get(cutter, args))
+        if isinstance(parsed, CutterParsingFailure):
+            assert got is None, args
+        else:
+            assert got is not None, args
+            assert str(parsed.value) == str(got.value), args
+            assert parsed.new_args == got.new_args, args
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from utils.lock_factory import LockFactory
+
+
+def test_lock_is_freed_after_release():
+    factory = LockFactory()
+
+    async def main():
+        async with factory.get_lock(1):
+            assert factory.locked(1)
+            assert len(factory) == 1
+        assert not factory.locked(1)
+
+    asyncio.run(main())
+    assert len(factory) == 0
+    assert factory.stats()["acquired"] == 1
+
+
+def test_waiters_keep_lock_until_last_release():
+    factory = LockFactory()
+    order = []
+
+    async def hold(name: str):
+        async with factory.get_lock("key"):
+            order.append(name)
+            await asyncio.sleep(0)
+            # Пока блокировку ждут, она не удаляется
+            assert len(factory) == 1
+
+    async def main():
+        await asyncio.gather(*(hold(name) for name in "abc"))
+
+    asyncio.run(main())
+    assert order == ["a", "b", "c"]
+    assert len(factory) == 0
+    assert factory.stats() == dict(size=0, max_size=1, acquired=3, contended=2)
+
+
+def test_cancelled_waiter_releases_reference():
+    factory = LockFactory()
+
+    async def main():
+        lock = factory.get_lock("key")
+        await lock.__aenter__()
+        waiter = asyncio.create_task(factory.get_lock("key").__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await lock.__aexit__(None, None, None)
+
+    asyncio.run(main())
+    assert len(factory) == 0
+
+
+def test_exception_releases_lock():
+    factory = LockFactory()
+
+    async def main():
+        with pytest.raises(ValueError):
+            async with factory.get_lock("key"):
+                raise ValueError
+        assert not factory.locked("key")
+
+    asyncio.run(main())
+    assert len(factory) == 0
+
+
+def test_memory_is_bounded_by_active_keys():
+    factory = LockFactory()
+
+    async def use(key: int):
+        async with factory.get_lock(key):
+            await asyncio.sleep(0)
+
+    async def main():
+        for start in range(0, 10000, 100):
+            await asyncio.gather(*(use(key) for key in range(start, start + 100)))
+
+    asyncio.run(main())
+    assert len(factory) == 0
+    assert factory.stats()["max_size"] == 100
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+
+from models.db import Log
+from utils.log_writer import LogWriter, OverflowPolicy
+
+
+def make_log(index: int) -> Log:
+    return Log(level="I", msg=str(index), date=datetime.now())
+
+
+def queued(writer: LogWriter) -> list[str]:
+    return [record.msg for record in writer._queue]
+
+
+def test_drop_oldest():
+    writer = LogWriter(max_size=3, overflow_policy=OverflowPolicy.drop_oldest)
+    for index in range(5):
+        writer.write(make_log(index))
+
+    assert queued(writer) == ["2", "3", "4"]
+    assert writer.stats()["dropped"] == 2
+
+
+def test_drop_newest():
+    writer = LogWriter(max_size=3, overflow_policy=OverflowPolicy.drop_newest)
+    for index in range(5):
+        writer.write(make_log(index))
+
+    assert queued(writer) == ["0", "1", "2"]
+    assert writer.stats()["dropped"] == 2
+
+
+def test_block_keeps_every_record(run_with_db):
+    async def main():
+        writer = LogWriter(
+            max_size=3, batch_size=2, overflow_policy=OverflowPolicy.block
+        )
+        for index in range(5):
+            writer.write(make_log(index))
+        assert queued(writer) == ["0", "1", "2"]
+        assert writer.stats()["reserve_size"] == 2
+
+        await writer.on_shutdown(None)
+        return writer.stats(), [log.msg for log in await Log.all().order_by("id")]
+
+    stats, messages = run_with_db(main)
+    assert messages == ["0", "1", "2", "3", "4"]
+    assert stats["dropped"] == 0
+    assert stats["written"] == 5
+    assert stats["queue_size"] == stats["reserve_size"] == 0
+
+
+def test_block_reserve_is_bounded():
+    writer = LogWriter(max_size=3, overflow_policy=OverflowPolicy.block)
+    # Без сброса очереди поток логов не копится без ограничений
+    results = [writer.write(make_log(index)) for index in range(10)]
+
+    assert results == [True] * 6 + [False] * 4
+    assert queued(writer) == ["0", "1", "2"]
+    assert writer.stats()["reserve_size"] == 3
+    assert writer.stats()["dropped"] == 4
+
+
+def test_block_keeps_order(run_with_db):
+    async def main():
+        writer = LogWriter(max_size=3, overflow_policy=OverflowPolicy.block)
+        for index in range(5):
+            writer.write(make_log(index))
+        # Место в очереди освободилось, но новая запись не обгоняет резерв
+        writer._queue.popleft()
+        writer.write(make_log(5))
+
+        await writer.on_shutdown(None)
+        return [log.msg for log in await Log.all().order_by("id")]
+
+    assert run_with_db(main) == ["1", "2", "3", "4", "5"]
+
+
+def test_flush_by_batch_size(run_with_db):
+    async def main():
+        writer = LogWriter(batch_size=2, flush_interval=60)
+        await writer.on_startup(None)
+        writer.write(make_log(0))
+        writer.write(make_log(1))
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            if writer.written:
+                break
+        written = writer.written
+        await writer.on_shutdown(None)
+        return written
+
+    assert run_with_db(main) == 2
@@ -0,0 +1,141 @@
+import asyncio
+import gc
+import itertools
+import tracemalloc
+import typing as ty
+from contextlib import suppress
+from types import SimpleNamespace
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.handler import CancelHandler, current_handler
+
+from middlewares.throttling import ThrottleNotices, ThrottlingMiddleware
+from utils.timer_queue import timers
+
+# Блокировка команды в тестах (в секундах)
+RATE_LIMIT = 0.05
+
+
+class FakeBot(Bot):
+    """
+    Бот, который запоминает удаленные сообщения вместо запросов к телеграму.
+    """
+
+    def __init__(self):
+        super(FakeBot, self).__init__("123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA")
+        self.deleted: set[tuple[int, int]] = set()
+
+    async def delete_message(self, chat_id: int, message_id: int) -> bool:
+        self.deleted.add((chat_id, message_id))
+        return True
+
+
+class FakeMessage:
+    """
+    Сообщение пользователя, ответ на которое получает новый id.
+    """
+
+    def __init__(self, chat_id: int, user_id: int, message_ids: ty.Iterator[int]):
+        self.chat = SimpleNamespace(id=chat_id)
+        self.from_user = SimpleNamespace(id=user_id)
+        self.sent: list[tuple[int, int]] = []
+        self._message_ids = message_ids
+
+    async def reply(self, _: str) -> SimpleNamespace:
+        message_id = next(self._message_ids)
+        self.sent.append((self.chat.id, message_id))
+        return SimpleNamespace(chat=self.chat, message_id=message_id)
+
+
+async def command(*_):
+    ...
+
+
+command.throttling_rate_limit = RATE_LIMIT
+
+
+async def flood(middleware: ThrottlingMiddleware, users: int, messages: int):
+    """
+    Каждый пользователь отправляет команду несколько раз подряд.
+    :return: Отправленные уведомления.
+    """
+    current_handler.set(command)
+    message_ids = itertools.count(1)
+    sent = []
+    for user_id in range(users):
+        message = FakeMessage(-user_id, user_id, message_ids)
+        for _ in range(messages):
+            with suppress(CancelHandler):
+                await middleware.on_process_message(message)
+        sent += message.sent
+    return sent
+
+
+async def run_flood(middleware: ThrottlingMiddleware, users: int, messages: int):
+    """
+    Флуд и ожидание удаления всех уведомлений.
+    :return: Отправленные и удаленные уведомления.
+    """
+    bot = FakeBot()
+    Dispatcher.set_current(Dispatcher(bot))
+    await timers.on_startup(None)
+    try:
+        sent = await flood(middleware, users, messages)
+        await asyncio.sleep(RATE_LIMIT * 4)
+    finally:
+        await timers.on_shutdown(None)
+    return sent, bot.deleted
+
+
+def test_notices_are_deleted():
+    middleware = ThrottlingMiddleware()
+    sent, deleted = asyncio.run(run_flood(middleware, users=10, messages=5))
+
+    # Пользователь получает одно уведомление за блокировку
+    assert len(sent) == 10
+    assert deleted == set(sent)
+    assert len(middleware.notices) == 0
+    assert len(timers) == 0
+
+
+def test_evicted_notices_are_deleted():
+    middleware = ThrottlingMiddleware()
+    middleware.notices = ThrottleNotices(maxsize=5)
+    sent, deleted = asyncio.run(run_flood(middleware, users=10, messages=3))
+
+    assert middleware.notices.stats()["evicted"] > 0
+    assert deleted == set(sent)
+
+
+def test_flood_memory_is_released():
+    """
+    Объекты, созданные для уведомлений и таймеров, освобождаются после флуда.
+    Считаются живые блоки памяти, выделенные в модулях антифлуда и таймеров:
+    размер таблиц словарей после удаления записей не уменьшается,
+    поэтому общий объем памяти не показывает утечку.
+    """
+    middleware = ThrottlingMiddleware()
+    users = 2000
+    filters = [
+        tracemalloc.Filter(True, "*middlewares/throttling.py"),
+        tracemalloc.Filter(True, "*utils/timer_queue.py"),
+    ]
+
+    def run() -> int:
+        sent, deleted = asyncio.run(run_flood(middleware, users=users, messages=5))
+        assert deleted == set(sent)
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+        return sum(stat.count for stat in snapshot.statistics("filename"))
+
+    tracemalloc.start()
+    try:
+        blocks = [run() for _ in range(2)]
+    finally:
+        tracemalloc.stop()
+
+    assert len(middleware.notices) == 0
+    assert len(timers) == 0
+    # Живут только ключи ограничителя (не больше одного на пользователя),
+    # а утечка оставила бы по несколько объектов на каждое из 2000 уведомлений
+    assert max(blocks) < users * 2, blocks
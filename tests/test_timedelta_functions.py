@@ -0,0 +1,149 @@
+import random
+import re
+from datetime import timedelta
+
+import pytest
+
+from utils.exceptions import InvalidFormatDuration, ToLongDuration
+from utils.timedelta_functions import (
+    MODIFIERS,
+    parse_timedelta_from_args,
+    parse_timedelta_from_text,
+)
+
+# Прежняя реализация разбора, с которой сравнивается текущая
+
+ALL_MODIFIER = "|".join("|".join(_) for _ in MODIFIERS.keys())
+PATTERN = re.compile(rf"(?P<value>\d+)\s?(?P<modifier>{ALL_MODIFIER})")
+LINE_PATTERN = re.compile(rf"^(\d+\s?({ALL_MODIFIER})\s?)+$")
+
+
+def _get_modifier_value(modifier: str) -> timedelta:
+    for modifiers_group in MODIFIERS:
+        if modifier in modifiers_group:
+            return MODIFIERS[modifiers_group]
+
+
+def old_parse_timedelta(value: str):
+    match = LINE_PATTERN.match(value)
+    if not match:
+        raise InvalidFormatDuration(f"Некорректный формат времени: {value}")
+
+    try:
+        result = timedelta()
+        for match in PATTERN.finditer(value):
+            value, modifier = match.groups()
+
+            result += int(value) * _get_modifier_value(modifier)
+    except OverflowError as e:
+        raise ToLongDuration("Временной отрезок слишком большой", origin_exception=e)
+
+    return result, match
+
+
+def old_parse_timedelta_from_text(text_duration: str):
+    if not text_duration:
+        return None
+
+    args = text_duration.split()
+    current_line = ""
+    last = None
+    errors = 0
+
+    for arg in args:
+        current_line += " " + arg
+        try:
+            last = old_parse_timedelta(current_line.strip())
+            errors = 0
+        except InvalidFormatDuration:
+            errors += 1
+            if errors == 3:
+                break
+
+    if last is None:
+        raise InvalidFormatDuration
+
+    duration, match = last
+    if duration <= timedelta(seconds=30):
+        return timedelta(seconds=30), match
+    return duration, match
+
+
+def outcome(func, text: str):
+    """
+    :return: Временной отрезок и кол-во использованных слов или тип исключения.
+    """
+    try:
+        result = func(text)
+    except (InvalidFormatDuration, ToLongDuration) as e:
+        return type(e)
+    if result is None:
+        return None
+    duration, consumed = result
+    if isinstance(consumed, re.Match):
+        consumed = len(consumed.string.split())
+    return duration, consumed
+
+
+UNITS = [unit for units in MODIFIERS for unit in units]
+NUMBERS = ["0", "1", "2", "15", "30", "90", "999999999", "10000000000000"]
+JUNK = ["x", "1x", "h1", "1.5h", "-1h", "", "мин1", "ч"]
+
+
+def random_token(rnd: random.Random) -> str:
+    kind = rnd.random()
+    if kind < 0.3:
+        return rnd.choice(NUMBERS)
+    if kind < 0.55:
+        return rnd.choice(UNITS)
+    if kind < 0.9:
+        # Одно или несколько слитных "число+указатель"
+        return "".join(
+            rnd.choice(NUMBERS) + rnd.choice(UNITS) for _ in range(rnd.randint(1, 3))
+        )
+    return rnd.choice(JUNK)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1h", (timedelta(hours=1), 1)),
+        ("1ч30м", (timedelta(hours=1, minutes=30), 1)),
+        ("1 ч 30 м причина", (timedelta(hours=1, minutes=30), 4)),
+        ("2d 3 часа", (timedelta(days=2, hours=3), 3)),
+        ("10s", (timedelta(seconds=30), 1)),  # Минимальный отрезок
+        ("1h x y z 2h", (timedelta(hours=1), 1)),
+    ],
+)
+def test_parse_examples(text, expected):
+    assert parse_timedelta_from_text(text) == expected
+
+
+@pytest.mark.parametrize("text", ["x", "1", "h 1", "1 2 3 4h"])
+def test_invalid_format(text):
+    with pytest.raises(InvalidFormatDuration):
+        parse_timedelta_from_text(text)
+
+
+def test_too_long_duration():
+    with pytest.raises(ToLongDuration):
+        parse_timedelta_from_text("99999999999 years")
+
+
+def test_empty_text():
+    assert parse_timedelta_from_text("") is None
+
+
+def test_args_and_text_are_equivalent():
+    assert parse_timedelta_from_args(["1", "h", "rest"]) == parse_timedelta_from_text(
+        "1 h rest"
+    )
+
+
+def test_matches_previous_implementation():
+    rnd = random.Random(0)
+    for _ in range(20000):
+        text = " ".join(random_token(rnd) for _ in range(rnd.randint(1, 6)))
+        assert outcome(parse_timedelta_from_text, text) == outcome(
+            old_parse_timedelta_from_text, text
+        ), text
@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from loguru import logger
+
+from utils import logger as logger_module
+from utils.handler_params import parser as parser_module
+
+
+@pytest.fixture
+def trace_records():
+    """
+    :return: Список TRACE записей, попавших в логер во время теста.
+    """
+    records = []
+    sink_id = logger.add(
+        records.append,
+        level="TRACE",
+        filter=lambda record: record["level"].name == "TRACE",
+    )
+    yield records
+    logger.remove(sink_id)
+    logger_module._update_trace_enabled("TRACE")
+
+
+@pytest.mark.parametrize(
+    "level, enabled", [("TRACE", True), ("DEBUG", False), ("INFO", False), (5, True)]
+)
+def test_trace_enabled_follows_level(level, enabled):
+    logger_module._update_trace_enabled(level)
+    try:
+        assert logger_module.trace_enabled() is enabled
+    finally:
+        logger_module._update_trace_enabled("TRACE")
+
+
+def test_disabled_trace_is_not_built(trace_records, monkeypatch):
+    from test_handler_params import make_message, typed
+
+    calls = []
+    monkeypatch.setattr(
+        parser_module, "logger", SimpleNamespace(trace=lambda *a, **kw: calls.append(a))
+    )
+    logger_module._update_trace_enabled("INFO")
+
+    parser = typed.__wrapped__.__dict__["parser"]
+    asyncio.run(parser.parse(make_message("/typed 1 2.5 <b>word</b> rest")))
+    assert calls == []
+
+
+def test_trace_keeps_markup_in_values(trace_records):
+    from test_handler_params import make_message, typed
+
+    parser = typed.__wrapped__.__dict__["parser"]
+    asyncio.run(parser.parse(make_message("/typed 1 2.5 <b>word</b> rest")))
+
+    # Значения не разбираются как разметка loguru
+    assert "word=<b>word</b>" in trace_records[-1].record["message"]
+
+
+def test_trace_does_not_parse_markup(trace_records, monkeypatch):
+    from test_handler_params import make_message, typed
+
+    # Разметка разбиралась бы loguru при каждом вызове
+    def opt(**_):
+        raise AssertionError("opt() is not expected in the hot path")
+
+    monkeypatch.setattr(
+        parser_module, "logger", SimpleNamespace(opt=opt, trace=logger.trace)
+    )
+    parser = typed.__wrapped__.__dict__["parser"]
+    asyncio.run(parser.parse(make_message("/typed 1 2.5 word rest")))
+    assert trace_records[-1].record["message"].startswith(
+        "Making params for handler typed finished: {"
+    )
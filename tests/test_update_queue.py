@@ -0,0 +1,144 @@
+import asyncio
+
+from aiogram import Bot, types
+
+from utils.priority import Priority, priority
+from utils.update_queue import QueueState, SchedulingDispatcher, UpdateQueue
+
+
+def make_update(update_id: int, text: str, chat_id: int = 1) -> types.Update:
+    command = text.split()[0]
+    return types.Update(
+        update_id=update_id,
+        message={
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "user"},
+            "text": text,
+            "entities": [
+                {"type": "bot_command", "offset": 0, "length": len(command)}
+            ],
+        },
+    )
+
+
+def make_dispatcher() -> SchedulingDispatcher:
+    dp = SchedulingDispatcher(Bot("123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"))
+    return dp
+
+
+def test_context_is_not_shared_between_updates():
+    dp = make_dispatcher()
+    seen = []
+
+    @dp.message_handler(commands="first")
+    async def first(message: types.Message):
+        seen.append(types.Message.get_current().message_id)
+
+    @dp.callback_query_handler()
+    async def callback(query: types.CallbackQuery):
+        # Сообщение предыдущего события не должно быть текущим
+        seen.append(types.Message.get_current())
+
+    async def main():
+        # Одна задача-обработчик, чтобы оба события прошли через нее
+        queue = UpdateQueue(workers=1)
+        await queue.on_startup(dp)
+        queue.put(make_update(1, "/first"))
+        queue.put(
+            types.Update(
+                update_id=2,
+                callback_query={
+                    "id": "1",
+                    "from": {"id": 1, "is_bot": False, "first_name": "user"},
+                    "chat_instance": "1",
+                    "data": "data",
+                },
+            )
+        )
+        await queue.on_shutdown(dp)
+        return queue
+
+    queue = asyncio.run(main())
+    assert seen == [1, None]
+    assert queue.processed == 2
+
+
+def test_polling_sheds_over_limit():
+    dp = make_dispatcher()
+    events = {}
+
+    @dp.message_handler(commands="ban")
+    @priority(Priority.high, silent=True)
+    async def ban(message: types.Message):
+        await events["released"].wait()
+
+    @dp.message_handler(commands="joke")
+    @priority(Priority.low, silent=True)
+    async def joke(message: types.Message):
+        await events["released"].wait()
+
+    async def main():
+        events["released"] = asyncio.Event()
+        queue = UpdateQueue(max_size=4, high_water=2, workers=1)
+        await queue.on_startup(dp)
+        states = [
+            await queue.put_or_shed(make_update(update_id, text, chat_id=update_id))
+            for update_id, text in enumerate(
+                ("/joke", "/joke", "/joke", "/ban", "/ban", "/ban"), start=1
+            )
+        ]
+        events["released"].set()
+        await queue.on_shutdown(dp)
+        return queue, states
+
+    queue, states = asyncio.run(main())
+    # Выше порога отбрасываются только события низкого приоритета,
+    # в переполненной очереди - все
+    assert states == [
+        QueueState.accepted,
+        QueueState.accepted,
+        QueueState.busy,
+        QueueState.accepted,
+        QueueState.accepted,
+        QueueState.unavailable,
+    ]
+    assert queue.shed == 2
+    assert queue.processed == 4
+
+
+def test_put_wait_blocks_above_high_water():
+    dp = make_dispatcher()
+    events = {}
+    processed = []
+
+    @dp.message_handler(commands="joke")
+    @priority(Priority.low)
+    async def joke(message: types.Message):
+        await events["released"].wait()
+        processed.append(message.message_id)
+
+    async def main():
+        events["released"] = asyncio.Event()
+        queue = UpdateQueue(max_size=4, high_water=2, workers=1)
+        await queue.on_startup(dp)
+        for update_id in (1, 2, 3):
+            await queue.put_wait(make_update(update_id, "/joke", chat_id=update_id))
+
+        # Событие ждет места в очереди, а не отбрасывается
+        waiting = asyncio.create_task(
+            queue.put_wait(make_update(4, "/joke", chat_id=4))
+        )
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+
+        events["released"].set()
+        state = await asyncio.wait_for(waiting, 5)
+        await queue.on_shutdown(dp)
+        return queue, state
+
+    queue, state = asyncio.run(main())
+    assert state == QueueState.accepted
+    assert processed == [1, 2, 3, 4]
+    assert queue.shed == 0
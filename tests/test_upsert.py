@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+from aiogram import types
+
+from models.db import User
+from models.db import upsert as upsert_module
+
+
+@pytest.mark.parametrize("supports_upsert", [True, False])
+def test_concurrent_first_messages(run_with_db, monkeypatch, supports_upsert):
+    """
+    Одновременные первые сообщения пользователя создают одну запись
+    и без блокировки в DBMiddleware.
+    """
+    if not supports_upsert:
+        monkeypatch.setattr(upsert_module, "_supports_upsert", lambda _: False)
+
+    async def get_user(first_name: str) -> User:
+        user = types.User(id=1, is_bot=False, first_name=first_name, username="u")
+        return await User.get_or_create_from_tg_user(user)
+
+    async def main():
+        User.cache.clear()
+        users = await asyncio.gather(*(get_user(f"name{i}") for i in range(10)))
+        return users, await User.filter(user_id=1).count()
+
+    users, count = run_with_db(main)
+    assert count == 1
+    assert len({user.pk for user in users}) == 1
+    assert len(upsert_module._locks) == 0
@@ -0,0 +1,192 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from utils import workers
+from utils.workers import WorkerPool
+
+
+def _echo_worker(index, conn, results):
+    """
+    Процесс-обработчик, записывающий id полученных событий в файл.
+    Очередь multiprocessing для результатов не подходит:
+    процесс, убитый во время записи, оставит ее заблокированной.
+    """
+    fd = os.open(results, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+    while True:
+        conn.send(True)
+        try:
+            batch = conn.recv()
+        except EOFError:
+            return
+        if batch is None:
+            return
+        for update in batch:
+            os.write(fd, f"{update['update_id']}\n".encode())
+
+
+class EchoPool(WorkerPool):
+    def __init__(self, workers_count: int, queue_size: int, results: Path):
+        super(EchoPool, self).__init__(
+            SimpleNamespace(updates_queue_size=queue_size), workers_count
+        )
+        self.results = results
+
+    def _process_args(self, index):
+        _, (index, child_conn, _) = super(EchoPool, self)._process_args(index)
+        return _echo_worker, (index, child_conn, self.results)
+
+
+def make_update(update_id: int, chat_id: int = 1) -> dict:
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}}}
+
+
+def collect(pool: EchoPool, count: int, timeout: float = 10) -> list[int]:
+    """
+    :return: Id событий, обработанных процессами, когда их станет `count`.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        text = pool.results.read_text() if pool.results.exists() else ""
+        received = [int(line) for line in text.split()]
+        if len(received) >= count or time.monotonic() > deadline:
+            return received
+        time.sleep(0.05)
+
+
+async def wait_for(predicate, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.05)
+
+
+@pytest.fixture
+def fast_watch(monkeypatch):
+    monkeypatch.setattr(workers, "WATCH_INTERVAL", 0.1)
+
+
+def test_respawned_worker_gets_backlog(fast_watch, tmp_path):
+    pool = EchoPool(1, queue_size=100, results=tmp_path / "results")
+
+    async def main():
+        tasks = [asyncio.create_task(pool.watch()), asyncio.create_task(pool.serve())]
+        loop = asyncio.get_running_loop()
+        try:
+            for update_id in range(5):
+                await pool.dispatch(make_update(update_id))
+            first = await loop.run_in_executor(None, collect, pool, 5)
+
+            process = pool._processes[0]
+            os.kill(process.pid, signal.SIGKILL)
+            await wait_for(lambda: process.exitcode is not None)
+
+            # События, пришедшие пока процесса нет, получит новый процесс
+            for update_id in range(5, 10):
+                await pool.dispatch(make_update(update_id))
+            await wait_for(lambda: pool.restarts == 1)
+            second = await loop.run_in_executor(None, collect, pool, 10)
+            return first, second
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    pool.start()
+    try:
+        first, second = asyncio.run(main())
+    finally:
+        pool.stop()
+
+    assert first == [0, 1, 2, 3, 4]
+    assert second == list(range(10))
+
+
+def test_full_queue_waits_for_worker(tmp_path):
+    pool = EchoPool(1, queue_size=3, results=tmp_path / "results")
+
+    async def main():
+        # Процесс не запущен, события копятся в очереди
+        for update_id in range(3):
+            await pool.dispatch(make_update(update_id))
+        blocked = asyncio.create_task(pool.dispatch(make_update(3)))
+        await asyncio.sleep(0.1)
+        assert not blocked.done()
+        assert pool.stats()["queued"] == 3
+
+        pool.start()
+        server = asyncio.create_task(pool.serve())
+        try:
+            await asyncio.wait_for(blocked, 10)
+            received = await asyncio.get_running_loop().run_in_executor(
+                None, collect, pool, 4
+            )
+        finally:
+            server.cancel()
+        return received
+
+    try:
+        received = asyncio.run(main())
+    finally:
+        pool.stop()
+
+    # Событие не отброшено, порядок сохранен
+    assert received == [0, 1, 2, 3]
+    assert pool.stats()["full_waits"] == 1
+
+
+def test_stop_drains_queues(tmp_path):
+    pool = EchoPool(2, queue_size=100, results=tmp_path / "results")
+
+    async def main():
+        for update_id in range(20):
+            await pool.dispatch(make_update(update_id, chat_id=update_id))
+
+    asyncio.run(main())
+
+    pool.start()
+    pool.stop()
+
+    assert sorted(collect(pool, 20)) == list(range(20))
+    assert all(process.exitcode == 0 for process in pool._processes)
+
+
+def test_worker_requests_batch_after_feeding(tmp_path):
+    """
+    Процесс-обработчик не запрашивает следующую пачку,
+    пока предыдущая не поместилась в очередь планировщика.
+    """
+    conn, child_conn = multiprocessing.Pipe()
+    fed = []
+
+    class Dispatcher:
+        released = None
+
+        async def feed_updates(self, updates):
+            await self.released.wait()
+            fed.extend(update.update_id for update in updates)
+
+    async def main():
+        dp = Dispatcher()
+        dp.released = asyncio.Event()
+        consumer = asyncio.create_task(workers._consume(child_conn, dp))
+        loop = asyncio.get_running_loop()
+
+        assert await loop.run_in_executor(None, conn.recv) is True
+        conn.send([make_update(1)])
+        await asyncio.sleep(0.1)
+        # Пачка еще не передана планировщику, новых запросов нет
+        assert not conn.poll()
+
+        dp.released.set()
+        assert await loop.run_in_executor(None, conn.recv) is True
+        conn.send(None)
+        await asyncio.wait_for(consumer, 10)
+
+    asyncio.run(main())
+    assert fed == [1]
@@ -0,0 +1,64 @@
+from aiogram import types
+
+from models.db import User
+from utils.write_behind import profile_writer
+
+
+def make_tg_user(user_id: int, first_name: str, username: str) -> types.User:
+    return types.User(
+        id=user_id, is_bot=False, first_name=first_name, username=username
+    )
+
+
+def test_flush_writes_only_marked_fields(run_with_db):
+    async def main():
+        User.cache.clear()
+        alice = await User.get_or_create_from_tg_user(
+            make_tg_user(1, "Alice", "alice")
+        )
+        bob = await User.get_or_create_from_tg_user(make_tg_user(2, "Bob", "bob"))
+
+        alice.update_user_data(make_tg_user(1, "Alicia", "alice"))
+        bob.update_user_data(make_tg_user(2, "Bob", "bobby"))
+        # Не отмеченные изменения экземпляров не сохраняются
+        alice.username = "stale"
+        bob.first_name = "stale"
+
+        await profile_writer.flush()
+        return await User.get(user_id=1), await User.get(user_id=2)
+
+    alice, bob = run_with_db(main)
+    assert (alice.first_name, alice.username) == ("Alicia", "alice")
+    assert (bob.first_name, bob.username) == ("Bob", "bobby")
+
+
+def test_flush_does_not_overwrite_upserted_data(run_with_db):
+    async def main():
+        User.cache.clear()
+        user = await User.get_or_create_from_tg_user(make_tg_user(1, "A", "a"))
+        user.update_user_data(make_tg_user(1, "B", "a"))
+
+        # Запись вытеснена из кэша и получена заново с более новыми данными
+        User.cache.clear()
+        await User.get_or_create_from_tg_user(make_tg_user(1, "C", "a"))
+
+        await profile_writer.flush()
+        return await User.get(user_id=1)
+
+    assert run_with_db(main).first_name == "C"
+
+
+def test_changes_are_snapshotted(run_with_db):
+    async def main():
+        User.cache.clear()
+        user = await User.get_or_create_from_tg_user(make_tg_user(1, "A", "a"))
+        user.update_user_data(make_tg_user(1, "B", "a"))
+        assert profile_writer.pending() == 1
+        # Значение после отметки не попадает в бд без новой отметки
+        user.first_name = "stale"
+
+        await profile_writer.flush()
+        return await User.get(user_id=1)
+
+    assert run_with_db(main).first_name == "B"
+    assert profile_writer.pending() == 0
@@ -19,4 +19,18 @@ def load_config() -> Config:
         bot_token=os.getenv("BOT_TOKEN"),
         superusers=frozenset(map(int, os.getenv("SUPERUSERS", "0").split(","))),
         logging=load_log_config(app_dir=app_dir),
+        chat_admins_cache_ttl=int(os.getenv("CHAT_ADMINS_CACHE_TTL", default=60)),
+        chat_permissions_cache_ttl=int(
+            os.getenv("CHAT_PERMISSIONS_CACHE_TTL", default=60)
+        ),
+        updates_queue_size=int(os.getenv("UPDATES_QUEUE_SIZE", default=1000)),
+        updates_queue_high_water=int(
+            os.getenv("UPDATES_QUEUE_HIGH_WATER", default=800)
+        ),
+        updates_workers=int(os.getenv("UPDATES_WORKERS", default=16)),
+        low_priority_max_delay=float(
+            os.getenv("LOW_PRIORITY_MAX_DELAY", default=5.0)
+        ),
+        lock_backend=os.getenv("LOCK_BACKEND", default="memory"),
+        lock_file=app_dir / os.getenv("LOCK_FILE", default="bot.lock"),
     )
@@ -8,5 +8,10 @@ def load_db_config(app_dir: Path) -> DBConfig:
     return DBConfig(
         db_type=DBType.from_str(os.getenv("DATABASE_TYPE", default='sqlite')),
         db_url=os.getenv("DATABASE_URL"),
-        db_path=str(app_dir / os.getenv("DATABASE_PATH", default="mydatabase.sqlite"))
+        db_path=str(app_dir / os.getenv("DATABASE_PATH", default="mydatabase.sqlite")),
+        cache_size=int(os.getenv("DATABASE_CACHE_SIZE", default=10000)),
+        cache_ttl=int(os.getenv("DATABASE_CACHE_TTL", default=300)),
+        profile_flush_interval=float(
+            os.getenv("DATABASE_PROFILE_FLUSH_INTERVAL", default=5.0)
+        ),
     )
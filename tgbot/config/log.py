@@ -14,4 +14,14 @@ def load_log_config(app_dir: Path) -> LoggingConfig:
         logging_db_path=str(
             app_dir / os.getenv("LOGGING_DATABASE_PATH", default="logs.sqlite")
         ),
+        logging_db_queue_size=int(
+            os.getenv("LOGGING_DATABASE_QUEUE_SIZE", default=10000)
+        ),
+        logging_db_batch_size=int(os.getenv("LOGGING_DATABASE_BATCH_SIZE", default=100)),
+        logging_db_flush_interval=float(
+            os.getenv("LOGGING_DATABASE_FLUSH_INTERVAL", default=1.0)
+        ),
+        logging_db_overflow_policy=os.getenv(
+            "LOGGING_DATABASE_OVERFLOW_POLICY", default="drop_oldest"
+        ),
     )
@@ -4,10 +4,15 @@ from models.config.webhook import WebhookConfig
 
 
 def load_webhook_config() -> WebhookConfig:
+    kwargs = {}
+    if secret := os.getenv("WEBHOOK_SECRET"):
+        kwargs["secret_str"] = secret
     return WebhookConfig(
         host=os.getenv("WEBHOOK_HOST"),
         port=os.getenv("WEBHOOK_PORT", default=443),
         path=os.getenv("WEBHOOK_PATH", default="/webhook"),
         listen_host=os.getenv("LISTEN_IP", default="localhost"),
         listen_port=int(os.getenv("LISTEN_PORT", default=3000)),
+        max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", default=40)),
+        **kwargs,
     )
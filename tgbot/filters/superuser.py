@@ -6,6 +6,8 @@ from dataclasses import dataclass
 from aiogram.dispatcher.filters import BoundFilter
 from aiogram.dispatcher.handler import ctx_data
 
+from utils.lazy import resolve
+
 if ty.TYPE_CHECKING:
     from models.db import User
 
@@ -16,6 +18,8 @@ class IsSuperuserFilter(BoundFilter):
     is_superuser: bool = None
 
     async def check(self, superusers: ty.Iterable[int], event) -> bool:
-        data = ctx_data.get()
-        user: User = data["user"]
+        # Id отправителя известен из события, запись из бд не нужна
+        if (tg_user := getattr(event, "from_user", None)) is not None:
+            return tg_user.id in superusers
+        user: User = await resolve(ctx_data.get()["user"])
         return user.user_id in superusers
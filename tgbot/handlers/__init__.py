@@ -1,5 +1,6 @@
+from . import chat_members
 from . import errors
 from . import mini_games
 from . import moderation
 
-__all__ = ["mini_games", "errors", "moderation"]
+__all__ = ["mini_games", "errors", "moderation", "chat_members"]
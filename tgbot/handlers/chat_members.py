@@ -0,0 +1,52 @@
+"""
+
+Отслеживание изменений участников чата.
+
+"""
+
+from __future__ import annotations
+
+import typing as ty
+
+from aiogram.types import ChatMemberStatus, ContentType
+
+from misc import dp
+from services.chat_permissions import invalidate_chat_permissions
+from utils.tg_permissions import invalidate_chat_admins
+
+if ty.TYPE_CHECKING:
+    from aiogram.types import ChatMemberUpdated, Message
+
+
+def is_admin_changed(update: ChatMemberUpdated) -> bool:
+    """
+    :return: True, если изменение затрагивает список администраторов чата.
+    """
+    return ChatMemberStatus.is_chat_admin(
+        update.old_chat_member.status
+    ) or ChatMemberStatus.is_chat_admin(update.new_chat_member.status)
+
+
+@dp.chat_member_handler(is_admin_changed)
+@dp.my_chat_member_handler(is_admin_changed)
+async def chat_admins_changed_handler(update: ChatMemberUpdated):
+    invalidate_chat_admins(update.chat.id)
+    # Об изменении прав по умолчанию событий не приходит,
+    # поэтому права обновляются хотя бы при изменении администраторов
+    invalidate_chat_permissions(update.chat.id)
+
+
+@dp.message_handler(
+    content_types=[ContentType.MIGRATE_TO_CHAT_ID, ContentType.MIGRATE_FROM_CHAT_ID]
+)
+async def chat_migrated_handler(message: Message):
+    # Группа стала супергруппой: у нее новый id и свои права
+    chat_ids = (
+        message.chat.id,
+        message.migrate_to_chat_id,
+        message.migrate_from_chat_id,
+    )
+    for chat_id in chat_ids:
+        if chat_id is not None:
+            invalidate_chat_admins(chat_id)
+            invalidate_chat_permissions(chat_id)
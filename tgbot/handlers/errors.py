@@ -13,7 +13,7 @@ from aiogram.utils.exceptions import (
 from loguru import logger
 
 from misc import dp
-from utils.exceptions import InvalidArgumentsError, ModerationError
+from utils.exceptions import HandlerTimeout, InvalidArgumentsError, ModerationError
 
 
 @dp.errors_handler()
@@ -31,6 +31,12 @@ async def errors_handler(update: types.Update, exception: Exception):
         await update.message.reply(
             f"Неправильное использование команды.{e.explanation}{usage_pattern}",
         )
+    except HandlerTimeout as e:
+        logger.warning(e.text)
+        if update.message:
+            await update.message.reply(
+                "Команда выполнялась слишком долго, попробуйте позже"
+            )
     except ModerationError as e:
         if isinstance(
             e.origin_exception, (UserIsAnAdministratorOfTheChat, CantRestrictChatOwner)
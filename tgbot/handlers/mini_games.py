@@ -5,6 +5,8 @@ import typing as ty
 from misc import dp
 from services.mini_games import choice, infa, random_num
 from utils.handler_params import set_usage_pattern
+from utils.handler_timeout import handler_timeout
+from utils.priority import Priority, priority
 from utils.rate_limit import rate_limit
 
 if ty.TYPE_CHECKING:
@@ -12,21 +14,27 @@ if ty.TYPE_CHECKING:
 
 
 @dp.message_handler(commands=["выбери", "choice"])
+@handler_timeout(5)
 @rate_limit(2)
+@priority(Priority.low)
 @set_usage_pattern("/выбери <аргумент> или <аргумент> или ...")
 async def choice_handler(message: Message):
     await message.reply(await choice(message))
 
 
 @dp.message_handler(commands="инфа")
+@handler_timeout(5)
 @rate_limit(2)
+@priority(Priority.low)
 @set_usage_pattern("/инфа <действие>")
 async def choice_handler(message: Message):
     await message.reply(await infa(message))
 
 
 @dp.message_handler(commands=["рандом", "random"])
+@handler_timeout(5)
 @rate_limit(2)
+@priority(Priority.low)
 @set_usage_pattern("/рандом [минимум] <максимум>")
 async def choice_handler(message: Message):
     await message.reply(await random_num(message))
@@ -7,6 +7,8 @@ from aiogram.types import ChatType
 from misc import dp
 from services.moderation import mute_user, unmute_user
 from utils.handler_params import set_usage_pattern
+from utils.handler_timeout import handler_timeout
+from utils.priority import Priority, priority
 from utils.rate_limit import rate_limit
 from utils.tg_permissions import UserHasPermissions, BotHasPermissions, Permission
 
@@ -19,7 +21,9 @@ if ty.TYPE_CHECKING:
     commands=["mute", "мут"],
     commands_prefix="/",
 )
+@handler_timeout(30)
 @rate_limit(10)
+@priority(Priority.high)
 @UserHasPermissions(Permission.CAN_RESTRICT_MEMBERS)
 @BotHasPermissions(Permission.CAN_RESTRICT_MEMBERS)
 @set_usage_pattern("/mute <получатель> <длительность> [причина]")
@@ -32,7 +36,9 @@ async def mute_cmd_handler(message: Message):
     commands=["unmute", "анмут"],
     commands_prefix="/",
 )
+@handler_timeout(30)
 @rate_limit(10)
+@priority(Priority.high)
 @UserHasPermissions(Permission.CAN_RESTRICT_MEMBERS)
 @BotHasPermissions(Permission.CAN_RESTRICT_MEMBERS)
 @set_usage_pattern("/unmute <получатель>")
@@ -5,6 +5,7 @@ import typing as ty
 from aiogram import Dispatcher
 from loguru import logger
 
+from utils import metrics
 from .config_middleware import ConfigMiddleware
 from .db_middleware import DBMiddleware
 from .logging_middleware import LoggingMiddleware
@@ -22,4 +23,7 @@ def setup(dispatcher: Dispatcher, config: Config):
     dispatcher.middleware.setup(DBMiddleware())
     dispatcher.middleware.setup(ConfigMiddleware(config))
     dispatcher.middleware.setup(LoggingMiddleware())
-    dispatcher.middleware.setup(ThrottlingMiddleware())
+    throttling = ThrottlingMiddleware()
+    metrics.register("throttling", throttling.limiter.stats)
+    metrics.register("throttle_notices", throttling.notices.stats)
+    dispatcher.middleware.setup(throttling)
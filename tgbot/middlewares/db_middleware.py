@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import partial
 from typing import Optional
 
 from aiogram import types
@@ -9,33 +10,42 @@ from loguru import logger
 
 from models.db import Chat, User
 from services.find_target_user import get_db_user_by_tg_user
-from utils.lock_factory import LockFactory
+from utils.lazy import Lazy
 
 
 class DBMiddleware(BaseMiddleware):
     """
     Middleware для получения данных из бд.
+    Блокировка пользователя не нужна: одновременные первые сообщения
+    создают одну запись, так как она получается атомарным upsert,
+    а без его поддержки - под блокировкой ключа (models.db.upsert).
     """
 
-    def __init__(self):
-        super(DBMiddleware, self).__init__()
-        self.lock_factory = LockFactory()
+    @staticmethod
+    async def get_user(user: types.User) -> User:
+        try:
+            return await User.get_or_create_from_tg_user(user)
+        except Exception as e:
+            logger.exception(e)
+            raise e
 
-    async def setup_chat(
-        self, data: dict, user: types.User, chat: Optional[types.Chat] = None
-    ):
+    @staticmethod
+    async def get_chat(chat: Optional[types.Chat]) -> Chat | types.Chat | None:
+        if not chat or chat.type == "private":
+            return chat
         try:
-            async with self.lock_factory.get_lock(f"{user.id}"):
-                user = await User.get_or_create_from_tg_user(user)
-            if chat and chat.type != "private":
-                async with self.lock_factory.get_lock(f"{chat.id}"):
-                    chat = await Chat.get_or_create_from_tg_chat(chat)
+            return await Chat.get_or_create_from_tg_chat(chat)
         except Exception as e:
             logger.exception(e)
             raise e
 
-        data["user"] = user
-        data["chat"] = chat
+    def setup_chat(
+        self, data: dict, user: types.User, chat: Optional[types.Chat] = None
+    ):
+        # Записи получаются из бд только если их запросит обработчик,
+        # фильтр или middleware. Остальные сообщения не обращаются к бд
+        data["user"] = Lazy(partial(self.get_user, user))
+        data["chat"] = Lazy(partial(self.get_chat, chat))
 
     @staticmethod
     async def fix_target(data: dict):
@@ -49,7 +59,7 @@ class DBMiddleware(BaseMiddleware):
     async def on_pre_process_message(self, message: types.Message, data: dict):
         if message.sender_chat:
             raise CancelHandler
-        await self.setup_chat(data, message.from_user, message.chat)
+        self.setup_chat(data, message.from_user, message.chat)
 
     async def on_process_message(self, _: types.Message, data: dict):
         await self.fix_target(data)
@@ -57,6 +67,6 @@ class DBMiddleware(BaseMiddleware):
     async def on_pre_process_callback_query(
         self, query: types.CallbackQuery, data: dict
     ):
-        await self.setup_chat(
+        self.setup_chat(
             data, query.from_user, query.message.chat if query.message else None
         )
@@ -6,6 +6,8 @@ from aiogram.dispatcher.middlewares import BaseMiddleware
 from aiogram.types import Chat as TgChat
 from loguru import logger
 
+from utils.lazy import resolve
+
 if ty.TYPE_CHECKING:
     from aiogram.types import Message
     from models.db import User, Chat
@@ -18,8 +20,9 @@ class LoggingMiddleware(BaseMiddleware):
 
     @staticmethod
     async def on_process_message(message: Message, data: dict):
-        user: User = data["user"]
-        chat: Chat | TgChat = data["chat"]
+        # Вызывается только для сообщений, у которых есть обработчик
+        user: User = await resolve(data["user"])
+        chat: Chat | TgChat = await resolve(data["chat"])
         command = message.text
 
         logger.opt(colors=True).log(
@@ -1,30 +1,124 @@
 from __future__ import annotations
 
-import asyncio
+import time
 import typing as ty
+from collections import OrderedDict
+from contextlib import suppress
+from functools import partial
 
 from aiogram import Dispatcher
 from aiogram.dispatcher.handler import CancelHandler, current_handler
 from aiogram.dispatcher.middlewares import BaseMiddleware
-from aiogram.utils.exceptions import Throttled
+from aiogram.utils.exceptions import MessageCantBeDeleted, MessageToDeleteNotFound
+
+from utils.gcra import RateLimiter, RateLimitResult
+from utils.timer_queue import timers
 
 if ty.TYPE_CHECKING:
+    from aiogram import Bot
     from aiogram.types import Message
 
+# Сколько секунд хранится уведомление, которое не удалось удалить вовремя
+NOTICE_TTL_GRACE = 60.0
+
+
+class ThrottleNotice(ty.NamedTuple):
+    """
+    Уведомление о превышении, ожидающее удаления.
+    """
+
+    chat_id: int
+    message_id: int
+    expires_at: float  # Время окончания блокировки (time.monotonic)
+
+
+class ThrottleNotices:
+    """
+    Уведомления о превышении, ожидающие удаления.
+    Обычно запись удаляется таймером при удалении уведомления,
+    а запись, которую не удалили вовремя, вытесняется по времени жизни.
+    Таймер хранит идентификаторы уведомления сам, поэтому уведомление
+    удаляется, даже если его запись уже вытеснена.
+    """
+
+    def __init__(self, maxsize: int = 10000, grace: float = NOTICE_TTL_GRACE):
+        """
+        :param maxsize: Максимальное кол-во записей.
+        :param grace: Сколько секунд запись хранится после окончания блокировки.
+        """
+        self.maxsize = maxsize
+        self.grace = grace
+
+        self.added = 0
+        self.evicted = 0
+
+        self._records: OrderedDict[tuple[int, int], ThrottleNotice] = OrderedDict()
+
+    def add(self, chat_id: int, message_id: int, expires_at: float) -> ThrottleNotice:
+        """
+        Сохраняет уведомление.
+        :param chat_id: Чат уведомления.
+        :param message_id: Сообщение уведомления.
+        :param expires_at: Время окончания блокировки (time.monotonic).
+        :return: Запись уведомления.
+        """
+        self._evict(time.monotonic())
+        notice = ThrottleNotice(chat_id, message_id, expires_at)
+        self._records[(chat_id, message_id)] = notice
+        self.added += 1
+        return notice
+
+    def pop(self, chat_id: int, message_id: int) -> ThrottleNotice | None:
+        """
+        Удаляет запись уведомления.
+        :return: Удаленная запись или None, если записи нет.
+        """
+        return self._records.pop((chat_id, message_id), None)
+
+    def _evict(self, now: float) -> None:
+        # Записи добавляются примерно в порядке окончания блокировки,
+        # поэтому устаревшие записи находятся в начале
+        while self._records:
+            notice = next(iter(self._records.values()))
+            if (
+                notice.expires_at + self.grace > now
+                and len(self._records) < self.maxsize
+            ):
+                return
+            self._records.popitem(last=False)
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики уведомлений.
+        """
+        return dict(size=len(self._records), added=self.added, evicted=self.evicted)
+
 
 class ThrottlingMiddleware(BaseMiddleware):
     """
     Middleware для контроля флуда.
+    Лимиты задаются декоратором `rate_limit` и проверяются по алгоритму GCRA
+    отдельно для каждого пользователя в каждом чате.
     """
 
-    def __init__(self, limit=1, key_prefix="antiflood_"):
+    def __init__(
+        self, limit=1, key_prefix="antiflood_", limiter: RateLimiter | None = None
+    ):
         self.rate_limit = limit
         self.prefix = key_prefix
+        self.limiter = limiter or RateLimiter()
+        self.notices = ThrottleNotices()
         super(ThrottlingMiddleware, self).__init__()
 
-    async def on_process_message(self, message: Message, *_):
+    def get_limit_and_key(self) -> tuple[float, str]:
+        """
+        :return: Лимит и ключ антифлуда текущего обработчика.
+        """
         handler = current_handler.get()  # Получаем обработчик команды
-        dispatcher = Dispatcher.get_current()
         if handler:
             # Если обработчик команды зарегистрирован, получаем настройку антифлуда
             limit = getattr(handler, "throttling_rate_limit", self.rate_limit)
@@ -35,77 +129,57 @@ class ThrottlingMiddleware(BaseMiddleware):
             # Обработчика команды нет
             limit = self.rate_limit
             key = f"{self.prefix}_message"
+        return limit, key
+
+    async def on_process_message(self, message: Message, *_):
+        limit, key = self.get_limit_and_key()
 
-        try:
-            # Проверяем соблюдение лимита
-            await dispatcher.throttle(key, rate=limit)
-        except Throttled as t:
+        # Проверяем соблюдение лимита
+        result = self.limiter.hit((message.chat.id, message.from_user.id, key), limit)
+        if not result.allowed:
             # Нарушение
-            await self.handle_throttled(message, t)
+            await self.handle_throttled(message, result)
             raise CancelHandler()  # Не пропускаем событие дальше
 
-    async def handle_throttled(self, message: Message, throttled: Throttled):
+    async def handle_throttled(self, message: Message, result: RateLimitResult):
         """
         Уведомляет пользователя о превышение.
-        Если команда уже заблокирована, то время блокировки прибавляется.
+        Уведомление удаляется таймером, когда команда снова станет доступна,
+        поэтому обработка события не ждет окончания блокировки.
         """
-        handler = current_handler.get()
-        dispatcher = Dispatcher.get_current()
-        if handler:
-            key = getattr(
-                handler, "throttling_key", f"{self.prefix}_{handler.__name__}"
-            )
-        else:
-            key = f"{self.prefix}_message"
+        # Уведомляем только о первом превышении за блокировку
+        if result.exceeded == 1:
+            await self.send_message_about_throttled(message, result.retry_after)
 
-        # Определяем время блокировки команды
-        delta = throttled.rate - throttled.delta
-
-        # Уведомляем о превышении
-        if throttled.exceeded_count <= 2:
-            await self.send_message_about_throttled(message, throttled)
-
-        # Блокируем
-        await asyncio.sleep(delta)
-
-        # Проверяем статус блокировки
-        thr = await dispatcher.check_key(key)
-
-        if thr.exceeded_count == throttled.exceeded_count:
-            # Если это последнее сообщение с вызовом команды
-            await dispatcher.release_key(key)
-            await self.delete_message_about_throttled(message, throttled)
-
-    @staticmethod
     async def send_message_about_throttled(
-        message: Message, throttled: Throttled
+        self, message: Message, retry_after: float
     ) -> None:
-        dispatcher = Dispatcher.get_current()
+        bot = Dispatcher.get_current().bot
         msg = await message.reply("Команда временно заблокирована")
-        msg_key = throttled.key + "_msg"
 
-        bucket = (
-            await dispatcher.storage.get_bucket(
-                chat=message.chat.id, user=message.from_user.id
-            )
-        ) or dict()
-        bucket[msg_key] = msg
-        await dispatcher.storage.set_bucket(
-            chat=message.chat.id, user=message.from_user.id, bucket=bucket
+        # Храним только идентификаторы уведомления
+        notice = self.notices.add(
+            msg.chat.id, msg.message_id, time.monotonic() + retry_after
+        )
+        timers.schedule(
+            (notice.chat_id, notice.message_id),
+            retry_after,
+            partial(
+                self.delete_message_about_throttled,
+                bot,
+                notice.chat_id,
+                notice.message_id,
+            ),
         )
 
-    @staticmethod
     async def delete_message_about_throttled(
-        message: Message, throttled: Throttled
+        self, bot: Bot, chat_id: int, message_id: int
     ) -> None:
-        dispatcher = Dispatcher.get_current()
-        msg_key = throttled.key + "_msg"
-        bucket = (
-            await dispatcher.storage.get_bucket(
-                chat=message.chat.id, user=message.from_user.id
-            )
-        ) or dict()
-
-        if msg := bucket.get(msg_key):
-            await msg.delete()
-            await dispatcher.release_key(msg_key)
+        """
+        Удаляет уведомление о превышении.
+        Вызывается таймером вне обработки события.
+        """
+        # Запись могла быть вытеснена, но сообщение все равно нужно удалить
+        self.notices.pop(chat_id, message_id)
+        with suppress(MessageCantBeDeleted, MessageToDeleteNotFound):
+            await bot.delete_message(chat_id, message_id)
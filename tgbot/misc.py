@@ -1,15 +1,16 @@
-from aiogram import Bot, Dispatcher
 from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from aiogram.types import ParseMode
 
 from config import load_config
 from models.config import Config
+from utils.bot import CoalescingBot
 from utils.logger import logger, setup_logger
+from utils.update_queue import SchedulingDispatcher
 
 current_config = load_config()
 
-bot = Bot(current_config.bot_token, parse_mode=ParseMode.HTML)
-dp = Dispatcher(bot, storage=MemoryStorage())
+bot = CoalescingBot(current_config.bot_token, parse_mode=ParseMode.HTML)
+dp = SchedulingDispatcher(bot, storage=MemoryStorage())
 
 
 def setup(config: Config):
@@ -19,11 +20,15 @@ def setup(config: Config):
 
     import filters
     import middlewares
-    from utils import executor
+    from services import chat_permissions
+    from utils import executor, lock_factory, tg_permissions
 
     middlewares.setup(dp, config)
     filters.setup(dp, config)
     executor.setup(config)
+    lock_factory.setup(config)
+    tg_permissions.setup(config)
+    chat_permissions.setup(config)
 
     logger.debug("Configure handlers...")
     import handlers  # noqa: unused import
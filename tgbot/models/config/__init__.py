@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 
+from aiogram.types import AllowedUpdates
+
 from .db import DBConfig
 from .logging import LoggingConfig
 from .webhook import WebhookConfig
@@ -29,6 +31,25 @@ class Config:
     date_time_format: str = "%Y-%m-%d %H:%M:%S.%f"
     time_to_cancel_actions: int = 60
     time_to_remove_temp_messages: int = 30
+    chat_admins_cache_ttl: int = 60  # Время жизни списка администраторов чата в кэше
+    # Время жизни прав чата по умолчанию в кэше.
+    # Столько времени после изменения прав администратором
+    # снятие ограничений может выдавать старые права
+    chat_permissions_cache_ttl: int = 60
+    updates_queue_size: int = 1000  # Максимальное кол-во событий в очереди
+    updates_queue_high_water: int = 800  # После этого вебхук отвечает 429
+    # Кол-во одновременно обрабатываемых событий,
+    # других ограничений на кол-во обработчиков нет
+    updates_workers: int = 16
+    # Сколько секунд команда низкого приоритета может ждать обработки
+    low_priority_max_delay: float = 5.0
+    # Блокировки между процессами для бд без upsert (sqlite до 3.35): memory или file
+    lock_backend: str = "memory"
+    lock_file: Path | None = None  # Файл блокировок для бэкенда file
+    # События, которые запрашиваются у Telegram: все типы.
+    # По умолчанию телеграм присылает все, кроме chat_member,
+    # который нужен для сброса кэша администраторов
+    allowed_updates: tuple[str, ...] = tuple(AllowedUpdates.all())
 
 
 __all__ = [DBConfig, LoggingConfig, WebhookConfig]
@@ -14,6 +14,9 @@ class DBConfig:
     db_type: DBType = None
     db_url: str = None
     db_path: str = None
+    cache_size: int = 10000  # Максимальное кол-во записей в кэше пользователей и чатов
+    cache_ttl: int = 300  # Время жизни записи в кэше (в секундах)
+    profile_flush_interval: float = 5.0  # Как часто сохранять изменения профилей
 
     def create_url_config(self) -> str:
         """
@@ -17,6 +17,12 @@ class LoggingConfig:
     logging_db_url: str = None
     logging_db_path: str = None
 
+    # Очередь записи логов в бд
+    logging_db_queue_size: int = 10000
+    logging_db_batch_size: int = 100
+    logging_db_flush_interval: float = 1.0
+    logging_db_overflow_policy: str = "drop_oldest"  # drop_oldest, drop_newest, block
+
     def create_url_config(self) -> str:
         """
         :return: Ссылка на базу данных с логами.
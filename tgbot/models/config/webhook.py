@@ -1,5 +1,5 @@
 import secrets
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -13,7 +13,10 @@ class WebhookConfig:
     path: str
     listen_host: str = "localhost"
     listen_port: int = 3000
-    secret_str: str = secrets.token_urlsafe(16)
+    # Все процессы бота должны использовать одинаковый секрет
+    secret_str: str = field(default_factory=lambda: secrets.token_urlsafe(16))
+    max_connections: int = 40  # Кол-во одновременных подключений телеграма к вебхуку
+    register_webhook: bool = True  # Регистрировать ли вебхук при запуске
 
     @property
     def url_base(self) -> str:
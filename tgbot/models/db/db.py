@@ -7,6 +7,7 @@ from tortoise import Tortoise, run_async
 
 from models.config import Config
 from .logging_db import __models__ as __logging_models__
+from .tg_db import Chat, User
 from .tg_db import __models__ as __tg_models__
 
 
@@ -52,6 +53,9 @@ def setup(executor: Executor, config: Config) -> None:
     :param executor: Исполнитель.
     :param config: Текущая конфигурация.
     """
+    for cache in (User.cache, Chat.cache):
+        cache.configure(maxsize=config.db.cache_size, ttl=config.db.cache_ttl)
+
     executor.on_startup(partial(on_startup, config=config))
     executor.on_shutdown(on_shutdown)
 
@@ -5,8 +5,8 @@
 """
 
 from .chat import Chat, ChatType
-from .moderator_actions import ModeratorEvent
 from .user import User
+from .moderator_actions import ModeratorEvent  # Использует Chat и User
 
 __models__ = [
     "models.db.tg_db.chat",
@@ -4,9 +4,13 @@ import typing as ty
 from enum import Enum
 
 from tortoise import fields
-from tortoise.exceptions import DoesNotExist
 from tortoise.models import Model
 
+from models.db.upsert import upsert
+from utils import metrics
+from utils.ttl_cache import TTLCache
+from utils.write_behind import profile_writer
+
 if ty.TYPE_CHECKING:
     from aiogram.types import Chat as TgChat
 
@@ -31,10 +35,14 @@ class Chat(Model):
     chat_id = fields.BigIntField(null=False, unique=True)
     chat_type: ChatType = ty.cast(ChatType, fields.CharEnumField(ChatType))
     title = fields.CharField(max_length=255, null=True)
+    username = fields.CharField(max_length=32, null=True)
 
     rules_msg_id = fields.BigIntField(null=True)
     greeting_msg_id = fields.BigIntField(null=True)
 
+    # Кэш чатов по telegram id
+    cache: ty.ClassVar[TTLCache[int, Chat]] = TTLCache(maxsize=10000, ttl=300)
+
     class Meta:
         app = "tg"
         table = "chats"
@@ -54,21 +62,57 @@ class Chat(Model):
         )
         return chat
 
+    def update_chat_data(self, chat: TgChat) -> None:
+        """
+        Обновляет данные о чате.
+        Изменения сохраняются в бд пачкой (utils.write_behind).
+        :param chat: Данные о чате, полученный от телеграма.
+        """
+        changed = []
+
+        if self.title != chat.title:
+            changed.append("title")
+            self.title = chat.title
+
+        if self.username != chat.username:
+            changed.append("username")
+            self.username = chat.username
+
+        if changed:
+            profile_writer.mark_dirty(self, changed)
+
     @classmethod
     async def get_or_create_from_tg_chat(cls, chat: TgChat) -> Chat:
         """
-        Получает чат из бд.
-        Если записи нет - создает.
+        Получает чат из кэша или бд.
+        Если записи нет - создает, если есть - обновляет данные.
+        Запись получается одним запросом (models.db.upsert).
         :param chat: Данные о чате, полученный от телеграма.
         :return: Экземпляр Chat.
         """
-        try:
-            chat = await cls.get(chat_id=chat.id)
-        except DoesNotExist:
-            chat = await cls.create_from_tg_chat(chat=chat)
-        return chat
+        if (db_chat := cls.cache.get(chat.id)) is not None:
+            db_chat.update_chat_data(chat)
+            return db_chat
+
+        db_chat = await upsert(
+            cls,
+            "chat_id",
+            dict(
+                chat_id=chat.id,
+                chat_type=chat.type,
+                title=chat.title,
+                username=chat.username,
+            ),
+            update_fields=("title", "username"),
+        )
+
+        cls.cache.set(chat.id, db_chat)
+        return db_chat
 
     def __repr__(self):
         return f'{self.chat_type} chat "{self.title}" ({self.chat_id})'
 
     __str__ = __repr__
+
+
+metrics.register("chats_cache", Chat.cache.stats)
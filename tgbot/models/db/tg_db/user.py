@@ -7,6 +7,11 @@ from tortoise import fields
 from tortoise.exceptions import DoesNotExist
 from tortoise.models import Model
 
+from models.db.upsert import upsert
+from utils import metrics
+from utils.ttl_cache import TTLCache
+from utils.write_behind import profile_writer
+
 if ty.TYPE_CHECKING:
     from aiogram.types import User as TgUser
 
@@ -23,6 +28,9 @@ class User(Model):
     username = fields.CharField(max_length=32, null=True)
     is_bot: bool = fields.BooleanField(null=True)
 
+    # Кэш пользователей по telegram id
+    cache: ty.ClassVar[TTLCache[int, User]] = TTLCache(maxsize=10000, ttl=300)
+
     class Meta:
         app = "tg"
         table = "users"
@@ -44,42 +52,44 @@ class User(Model):
 
         return user
 
-    async def update_user_data(self, user_tg: TgUser) -> None:
+    def update_user_data(self, user_tg: TgUser) -> None:
         """
-        Обновляет данные о пользователе в бд.
+        Обновляет данные о пользователе.
+        Изменения сохраняются в бд пачкой (utils.write_behind).
         :param user_tg: Данные о пользователе, полученный от телеграма.
         """
-        changed = False
+        changed = []
 
         if self.user_id is None and user_tg.id is not None:
-            changed = True
+            changed.append("user_id")
             self.user_id = user_tg.id
 
         if user_tg.first_name is not None:
             if self.first_name != user_tg.first_name:
-                changed = True
+                changed.append("first_name")
                 self.first_name = user_tg.first_name
 
             if self.last_name != user_tg.last_name:
-                changed = True
+                changed.append("last_name")
                 self.last_name = user_tg.last_name
 
             if self.username != user_tg.username:
-                changed = True
+                changed.append("username")
                 self.username = user_tg.username
 
             if self.is_bot is None and user_tg.is_bot is not None:
-                changed = True
+                changed.append("is_bot")
                 self.is_bot = user_tg.is_bot
 
         if changed:
-            await self.save()
+            profile_writer.mark_dirty(self, changed)
 
     @classmethod
     async def get_or_create_from_tg_user(cls, user_tg: TgUser) -> User:
         """
-        Получает пользователя из бд.
-        Если записи нет - создает.
+        Получает пользователя из кэша или бд.
+        Если записи нет - создает, если есть - обновляет данные.
+        Запись получается одним запросом (models.db.upsert).
         :param user_tg: Данные о чате, полученный от телеграма.
         :return: Экземпляр Chat.
         """
@@ -89,12 +99,30 @@ class User(Model):
             except DoesNotExist:
                 raise RuntimeError(f"User without user_id: {user_tg}")
 
-        try:
-            user = await cls.get(user_id=user_tg.id)
-        except DoesNotExist:
-            return await cls.create_from_tg_user(user_tg)
-        else:
-            await user.update_user_data(user_tg)
+        if (user := cls.cache.get(user_tg.id)) is not None:
+            user.update_user_data(user_tg)
+            return user
+
+        # Имя обновляется, только если телеграм прислал полные данные
+        user = await upsert(
+            cls,
+            "user_id",
+            dict(
+                user_id=user_tg.id,
+                first_name=user_tg.first_name,
+                last_name=user_tg.last_name,
+                username=user_tg.username,
+                is_bot=user_tg.is_bot,
+            ),
+            update_fields=(
+                ("first_name", "last_name", "username")
+                if user_tg.first_name is not None
+                else ()
+            ),
+            fill_fields=("is_bot",),
+        )
+
+        cls.cache.set(user_tg.id, user)
         return user
 
     @property
@@ -132,3 +160,6 @@ class User(Model):
         return rez
 
     __str__ = __repr__
+
+
+metrics.register("users_cache", User.cache.stats)
@@ -0,0 +1,178 @@
+"""
+
+Получение или создание записи одним запросом.
+Используется INSERT ... ON CONFLICT DO UPDATE ... RETURNING (sqlite, postgres)
+или INSERT ... ON DUPLICATE KEY UPDATE (mysql, запись читается вторым запросом).
+Запрос атомарен, поэтому блокировки не нужны даже при нескольких процессах.
+
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import typing as ty
+
+from tortoise.exceptions import DoesNotExist
+
+from utils import metrics
+from utils.lock_factory import LockFactory
+from utils.write_behind import profile_writer
+
+if ty.TYPE_CHECKING:
+    from tortoise.backends.base.client import BaseDBAsyncClient
+    from tortoise.models import Model
+
+M = ty.TypeVar("M", bound="Model")
+
+# RETURNING поддерживается sqlite начиная с 3.35
+SQLITE_RETURNING_VERSION = (3, 35, 0)
+
+# Блокировки для бд, в которых запрос не поддерживается.
+# Между процессами действуют, только если выбран бэкенд file (utils.lock_factory)
+_locks = LockFactory()
+metrics.register("upsert_locks", _locks.stats)
+
+
+def _quote(dialect: str, name: str) -> str:
+    return f"`{name}`" if dialect == "mysql" else f'"{name}"'
+
+
+def _placeholders(dialect: str, count: int) -> list[str]:
+    if dialect == "postgres":
+        return [f"${index}" for index in range(1, count + 1)]
+    if dialect == "mysql":
+        return ["%s"] * count
+    return ["?"] * count
+
+
+def _supports_upsert(connection: BaseDBAsyncClient) -> bool:
+    dialect = connection.capabilities.dialect
+    if dialect == "sqlite":
+        return sqlite3.sqlite_version_info >= SQLITE_RETURNING_VERSION
+    return dialect in {"postgres", "mysql"}
+
+
+def _build_query(
+    model: type[Model],
+    dialect: str,
+    key_field: str,
+    columns: list[str],
+    update_fields: ty.Iterable[str],
+    fill_fields: ty.Iterable[str],
+) -> str:
+    table = _quote(dialect, model._meta.db_table)
+
+    def new_value(field: str) -> str:
+        if dialect == "mysql":
+            return f"VALUES({_quote(dialect, field)})"
+        return f"excluded.{_quote(dialect, field)}"
+
+    assignments = [
+        f"{_quote(dialect, field)} = {new_value(field)}" for field in update_fields
+    ]
+    assignments += [
+        f"{_quote(dialect, field)} = "
+        f"COALESCE({table}.{_quote(dialect, field)}, {new_value(field)})"
+        for field in fill_fields
+    ]
+    if not assignments:
+        # Пустое обновление нужно, чтобы RETURNING вернул существующую запись
+        assignments.append(f"{_quote(dialect, key_field)} = {new_value(key_field)}")
+
+    query = (
+        f"INSERT INTO {table} ({', '.join(_quote(dialect, c) for c in columns)}) "
+        f"VALUES ({', '.join(_placeholders(dialect, len(columns)))}) "
+    )
+    if dialect == "mysql":
+        return query + f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+    return (
+        query
+        + f"ON CONFLICT ({_quote(dialect, key_field)}) "
+        + f"DO UPDATE SET {', '.join(assignments)} RETURNING *"
+    )
+
+
+async def _get_or_create_locked(
+    model: type[M],
+    key_field: str,
+    values: dict[str, ty.Any],
+    update_fields: ty.Iterable[str],
+    fill_fields: ty.Iterable[str],
+) -> M:
+    """
+    SELECT и INSERT под блокировкой процесса для бд без поддержки upsert.
+    """
+    async with _locks.get_lock((model.__name__, values[key_field])):
+        try:
+            record = await model.get(**{key_field: values[key_field]})
+        except DoesNotExist:
+            return await model.create(**values)
+
+        changed = [
+            field for field in update_fields if getattr(record, field) != values[field]
+        ]
+        changed += [
+            field
+            for field in fill_fields
+            if getattr(record, field) is None and values[field] is not None
+        ]
+        if changed:
+            for field in changed:
+                setattr(record, field, values[field])
+            await record.save(update_fields=changed)
+        return record
+
+
+async def upsert(
+    model: type[M],
+    key_field: str,
+    values: dict[str, ty.Any],
+    update_fields: ty.Iterable[str] = (),
+    fill_fields: ty.Iterable[str] = (),
+) -> M:
+    """
+    Создает запись или обновляет существующую с тем же значением `key_field`.
+    :param model: Модель.
+    :param key_field: Уникальное поле, по которому ищется запись.
+    :param values: Значения полей новой записи.
+    :param update_fields: Поля существующей записи, которые перезаписываются.
+    :param fill_fields: Поля существующей записи, которые заполняются,
+        только если в них нет значения.
+    :return: Созданная или обновленная запись.
+    """
+    update_fields = tuple(update_fields)
+    fill_fields = tuple(fill_fields)
+    record = await _upsert(model, key_field, values, update_fields, fill_fields)
+    # Отложенные изменения этих полей старше только что записанных
+    profile_writer.discard(record, update_fields)
+    return record
+
+
+async def _upsert(
+    model: type[M],
+    key_field: str,
+    values: dict[str, ty.Any],
+    update_fields: tuple[str, ...],
+    fill_fields: tuple[str, ...],
+) -> M:
+    connection = model._meta.db
+    if not _supports_upsert(connection):
+        return await _get_or_create_locked(
+            model, key_field, values, update_fields, fill_fields
+        )
+
+    dialect = connection.capabilities.dialect
+    columns = list(values)
+    query = _build_query(model, dialect, key_field, columns, update_fields, fill_fields)
+    fields_map = model._meta.fields_map
+    params = [
+        fields_map[column].to_db_value(values[column], model) for column in columns
+    ]
+
+    if dialect == "mysql":
+        # В mysql нет RETURNING, запись читается вторым запросом
+        await connection.execute_query(query, params)
+        return await model.get(**{key_field: values[key_field]})
+
+    rows = await connection.execute_query_dict(query, params)
+    return model._init_from_db(**rows[0])
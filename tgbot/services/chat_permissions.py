@@ -0,0 +1,53 @@
+"""
+
+Модуль, реализующий кэш прав участников чата по умолчанию.
+
+"""
+
+from __future__ import annotations
+
+import typing as ty
+
+from utils import metrics
+from utils.ttl_cache import TTLCache
+
+if ty.TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.types import ChatPermissions
+    from models.config import Config
+
+# Права по умолчанию по id чата.
+# Telegram не присылает события об изменении прав по умолчанию,
+# а restrict_chat_member принимает и устаревшие права.
+# Поэтому после изменения прав администратором снятие ограничений
+# может выдавать старые права, пока запись не устареет.
+# Записи также удаляются при изменении администраторов чата
+chat_permissions_cache: TTLCache[int, ChatPermissions] = TTLCache(
+    maxsize=10000, ttl=60
+)
+metrics.register("chat_permissions_cache", chat_permissions_cache.stats)
+
+
+def setup(config: Config) -> None:
+    chat_permissions_cache.configure(ttl=config.chat_permissions_cache_ttl)
+
+
+async def get_chat_permissions(bot: Bot, chat_id: int) -> ChatPermissions:
+    """
+    Получает права участников чата по умолчанию.
+    Запрашивает их у телеграма, только если в кэше нет актуальных.
+    :param bot:
+    :param chat_id: Id чата.
+    """
+    permissions = chat_permissions_cache.get(chat_id)
+    if permissions is None:
+        permissions = (await bot.get_chat(chat_id)).permissions
+        chat_permissions_cache.set(chat_id, permissions)
+    return permissions
+
+
+def invalidate_chat_permissions(chat_id: int) -> None:
+    """
+    Удаляет права чата из кэша.
+    """
+    chat_permissions_cache.pop(chat_id)
@@ -17,14 +17,14 @@ from models.db import User
 
 if ty.TYPE_CHECKING:
     from aiogram.types import Message
-    from utils.safe_list import SafeList
+    from utils.args_cursor import ArgsCursor
 
 
 def get_target_user(
     message: Message,
-    args: SafeList | None = None,
+    args: ArgsCursor | None = None,
     can_be_bot: bool = False,
-) -> tuple[TgUser, SafeList | None] | None:
+) -> tuple[TgUser, ArgsCursor | None] | None:
     """
     Получает целевого пользователя.
     :param message:
@@ -60,8 +60,8 @@ def has_target_user(target_user: TgUser, can_be_bot: bool) -> True | False:
 
 
 def get_mentioned_user(
-    message: Message, args: SafeList | None = None
-) -> tuple[TgUser | None, SafeList | None]:
+    message: Message, args: ArgsCursor | None = None
+) -> tuple[TgUser | None, ArgsCursor | None]:
     """
     Пытается получить пользователя из упоминания.
     """
@@ -76,12 +76,12 @@ def get_mentioned_user(
     for ent in entities:
         if ent.type == "text_mention":
             if args is not None:
-                args = args[len(ent.get_text(message.text)) :]
+                args = args.advance(len(ent.get_text(message.text)))
             return ent.user, args
         elif ent.type == "mention":
             username = ent.get_text(message.text).lstrip("@")
             if args is not None:
-                args = args[1:]
+                args = args.advance()
             return TgUser(username=username), args
     return None, args
 
@@ -94,14 +94,16 @@ def get_replied_user(message: Message) -> TgUser | None:
         return message.reply_to_message.from_user
 
 
-def get_id_user(message: Message, args: SafeList | None = None) -> TgUser | None:
+def get_id_user(message: Message, args: ArgsCursor | None = None) -> TgUser | None:
     """
     Пытается получить пользователя по id из аргументов команды.
     """
-    args: SafeList | str = args or message.get_args() or ""
-    args: list[str] = [args[0]] if isinstance(args, list) else args.lower().split()
+    if args:
+        words = [args.peek()]
+    else:
+        words = (message.get_args() or "").lower().split()
 
-    for word in args:
+    for word in words:
         if word.startswith("id"):
             with suppress(ValueError):
                 user_id = int(word.removeprefix("id"))
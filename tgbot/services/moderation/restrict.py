@@ -8,12 +8,13 @@ from loguru import logger
 
 from config import moderation
 from models.db import ModeratorEvent
+from models.restriction import TypeRestriction
+from services.chat_permissions import get_chat_permissions, invalidate_chat_permissions
 from utils.exceptions import CantRestrict
 
 if ty.TYPE_CHECKING:
     from aiogram import Bot
     from models.db import User, Chat
-    from models.restriction import TypeRestriction
 
 
 async def restrict(
@@ -88,9 +89,13 @@ async def un_restrict(bot: Bot, chat: Chat, target: User) -> None:
         await bot.restrict_chat_member(
             chat_id=chat.chat_id,
             user_id=target.user_id,
-            permissions=(await bot.get_chat(chat.chat_id)).permissions,
+            permissions=await get_chat_permissions(bot, chat.chat_id),
         )
     except BadRequest as e:
+        # Права в кэше могли устареть.
+        # Ужесточение прав так не обнаружить: запрос с устаревшими правами
+        # выполняется успешно, поэтому время жизни кэша небольшое
+        invalidate_chat_permissions(chat.chat_id)
         raise CantRestrict(
             origin_exception=e,
             text=e.text,
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import typing as ty
+from itertools import islice
+
+from utils.safe_list import SafeList
+
+
+class ArgsCursor:
+    """
+    Неизменяемый курсор по аргументам команды.
+    Чтение и сдвиг выполняются за O(1), список аргументов не копируется.
+    Для совместимости поддерживает интерфейс SafeList:
+    `args[0]`, `args[1:]`, `len(args)`, `" ".join(args)` и `args.cleared()`.
+    """
+
+    __slots__ = ("_args", "_pos")
+
+    def __init__(self, args: ty.Iterable[str] = (), pos: int = 0):
+        """
+        :param args: Аргументы команды.
+        :param pos: Позиция первого не обработанного аргумента.
+        """
+        self._args: tuple[str, ...] = args if isinstance(args, tuple) else tuple(args)
+        self._pos = min(pos, len(self._args))
+
+    @classmethod
+    def from_text(cls, text: str | None) -> ArgsCursor:
+        """
+        Разбивает текст на аргументы.
+        """
+        return cls(tuple((text or "").split()))
+
+    def peek(self, offset: int = 0) -> str | None:
+        """
+        :return: Аргумент со смещением `offset` от курсора или None.
+        """
+        index = self._pos + offset
+        if self._pos <= index < len(self._args):
+            return self._args[index]
+        return None
+
+    def advance(self, count: int = 1) -> ArgsCursor:
+        """
+        :return: Курсор, сдвинутый на `count` аргументов.
+        """
+        return ArgsCursor(self._args, self._pos + count)
+
+    def exhausted(self) -> ArgsCursor:
+        """
+        :return: Курсор, у которого не осталось аргументов.
+        """
+        return ArgsCursor(self._args, len(self._args))
+
+    def rest(self) -> tuple[str, ...]:
+        """
+        :return: Оставшиеся аргументы.
+        """
+        return self._args[self._pos :]
+
+    # Совместимость с SafeList
+
+    def cleared(self) -> ArgsCursor:
+        return self.exhausted()
+
+    def __getitem__(self, index: int | slice) -> str | ArgsCursor | SafeList | None:
+        if isinstance(index, slice):
+            start = index.start or 0
+            if start >= 0 and index.stop is None and index.step is None:
+                return self.advance(start)
+            return SafeList(self.rest()[index])
+
+        if index < 0:
+            index += len(self)
+        return self.peek(index) if index >= 0 else None
+
+    def __len__(self) -> int:
+        return len(self._args) - self._pos
+
+    def __bool__(self) -> bool:
+        return self._pos < len(self._args)
+
+    def __iter__(self) -> ty.Iterator[str]:
+        return islice(self._args, self._pos, None)
+
+    def __eq__(self, other: ty.Any) -> bool:
+        if isinstance(other, ArgsCursor):
+            return self.rest() == other.rest()
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {list(self)!r}>"
@@ -0,0 +1,49 @@
+"""
+
+Бот с объединением одинаковых запросов на чтение к Bot API.
+
+"""
+
+from __future__ import annotations
+
+import typing as ty
+
+from aiogram import Bot
+
+from utils import metrics
+from utils.singleflight import SingleFlight
+
+if ty.TYPE_CHECKING:
+    from aiogram import types
+
+# Общие для всех экземпляров бота выполняющиеся запросы
+bot_requests = SingleFlight()
+metrics.register("bot_requests", bot_requests.stats)
+
+
+class CoalescingBot(Bot):
+    """
+    Бот, у которого одновременные одинаковые запросы
+    `get_chat`, `get_chat_administrators` и `get_chat_member`
+    выполняются один раз, а результат получают все вызвавшие.
+    """
+
+    async def get_chat(self, chat_id: int | str) -> types.Chat:
+        return await bot_requests.do(
+            (self.id, "get_chat", chat_id),
+            lambda: super(CoalescingBot, self).get_chat(chat_id),
+        )
+
+    async def get_chat_administrators(
+        self, chat_id: int | str
+    ) -> list[types.ChatMemberOwner | types.ChatMemberAdministrator]:
+        return await bot_requests.do(
+            (self.id, "get_chat_administrators", chat_id),
+            lambda: super(CoalescingBot, self).get_chat_administrators(chat_id),
+        )
+
+    async def get_chat_member(self, chat_id: int | str, user_id: int) -> types.ChatMember:
+        return await bot_requests.do(
+            (self.id, "get_chat_member", chat_id, user_id),
+            lambda: super(CoalescingBot, self).get_chat_member(chat_id, user_id),
+        )
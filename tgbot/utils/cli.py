@@ -32,6 +32,13 @@ def create_parser():
         const=True,
         help="Пропустить не обработанные события",
     )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Кол-во процессов бота. В режиме pooling события распределяются "
+        "между процессами по id чата, в режиме WebHook процессы слушают один порт",
+    )
     return arg_parser
 
 
@@ -39,14 +46,33 @@ def cli(config: Config, webhook: bool | None = None, skip_updates: bool | None =
     parser = create_parser()
     namespace = parser.parse_args()
 
+    if namespace.workers > 1:
+        from utils import workers
+
+        if namespace.webhook or webhook:
+            logger.debug("starting webhook with {} workers...", namespace.workers)
+            workers.run_webhook(config, namespace.workers)
+        else:
+            logger.debug("starting polling with {} workers...", namespace.workers)
+            workers.run(
+                config, namespace.workers, bool(namespace.skip_updates or skip_updates)
+            )
+        return
+
     import misc
     from utils.executor import runner
+    from utils.update_queue import QueuedWebhookRequestHandler
 
     misc.setup(config)
     if namespace.webhook or webhook:
         logger.debug("starting webhook...")
-        runner.start_webhook(**config.webhook.listener_kwargs)
+        runner.start_webhook(
+            request_handler=QueuedWebhookRequestHandler,
+            **config.webhook.listener_kwargs,
+        )
     else:
         logger.debug("starting polling...")
         runner.skip_updates = namespace.skip_updates or skip_updates
-        runner.start_polling(reset_webhook=True)
+        runner.start_polling(
+            reset_webhook=True, allowed_updates=list(config.allowed_updates)
+        )
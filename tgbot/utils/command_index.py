@@ -0,0 +1,212 @@
+"""
+
+Индекс обработчиков сообщений по названию команды.
+Вместо последовательной проверки фильтров всех обработчиков
+проверяются только обработчики нужной команды и обработчики без команд.
+
+"""
+
+from __future__ import annotations
+
+from aiogram import Dispatcher, types
+from aiogram.dispatcher.filters import Command, FilterNotPassed, check_filters
+from aiogram.dispatcher.handler import (
+    CancelHandler,
+    Handler,
+    SkipHandler,
+    _check_spec,
+    ctx_data,
+    current_handler,
+)
+
+HandlerObj = Handler.HandlerObj
+
+
+def _get_command_filter(handler_obj: HandlerObj) -> Command | None:
+    """
+    :return: Фильтр команды обработчика или None.
+    """
+    for filter_obj in handler_obj.filters or ():
+        if isinstance(filter_obj.filter, Command):
+            return filter_obj.filter
+    return None
+
+
+class CommandIndex:
+    """
+    Индекс обработчиков по названию команды.
+    Для каждой команды хранит ее обработчики вместе с обработчиками без команд
+    в порядке регистрации. Перестраивается после изменения списка обработчиков.
+    """
+
+    def __init__(self, handler: Handler):
+        """
+        :param handler: Обработчик событий, список обработчиков которого индексируется.
+        """
+        self._handler = handler
+        self._built_for: list[HandlerObj] | None = None
+        self._built_size = 0
+        self._prefixes: set[str] = set()
+        self._generic: tuple[HandlerObj, ...] = ()
+        self._by_command: dict[str, tuple[HandlerObj, ...]] = {}
+
+    def invalidate(self) -> None:
+        self._built_for = None
+
+    def _build(self) -> None:
+        handlers = self._handler.handlers
+        commands: dict[str, list[HandlerObj]] = {}
+        command_filters: list[Command | None] = []
+        prefixes: set[str] = set()
+
+        for handler_obj in handlers:
+            command_filter = _get_command_filter(handler_obj)
+            command_filters.append(command_filter)
+            if command_filter is not None:
+                prefixes.update(command_filter.prefixes)
+                for command in command_filter.commands:
+                    commands.setdefault(command.lower(), [])
+
+        # Для каждой команды сохраняем ее обработчики вместе с обработчиками без команд
+        generic: list[HandlerObj] = []
+        for handler_obj, command_filter in zip(handlers, command_filters):
+            if command_filter is None:
+                generic.append(handler_obj)
+                for candidates in commands.values():
+                    candidates.append(handler_obj)
+            else:
+                for command in {command.lower() for command in command_filter.commands}:
+                    commands[command].append(handler_obj)
+
+        self._prefixes = prefixes
+        self._generic = tuple(generic)
+        self._by_command = {
+            command: tuple(candidates) for command, candidates in commands.items()
+        }
+        self._built_for = handlers
+        self._built_size = len(handlers)
+
+    def _ensure_built(self) -> None:
+        # Список могли заменить или изменить в обход register
+        handlers = self._handler.handlers
+        if self._built_for is not handlers or self._built_size != len(handlers):
+            self._build()
+
+    def get_command(self, message: types.Message) -> str | None:
+        """
+        :return: Название команды из сообщения в нижнем регистре
+            или None, если сообщение не похоже на команду.
+        """
+        self._ensure_built()
+
+        text = message.text or message.caption
+        if not text or text[0] not in self._prefixes:
+            return None
+
+        command = text.split(maxsplit=1)[0][1:].partition("@")[0].lower()
+        return command if command in self._by_command else None
+
+    def candidates(self, message: types.Message) -> tuple[HandlerObj, ...]:
+        """
+        :return: Обработчики, которые могут обработать сообщение.
+        """
+        if (command := self.get_command(message)) is None:
+            return self._generic
+        return self._by_command[command]
+
+
+class IndexedHandler(Handler):
+    """
+    Обработчик сообщений, проверяющий только обработчики команды сообщения
+    и обработчики без команд. Порядок проверки совпадает с порядком регистрации.
+    """
+
+    def __init__(self, dispatcher, once=True, middleware_key=None):
+        super(IndexedHandler, self).__init__(dispatcher, once, middleware_key)
+        self.index = CommandIndex(self)
+
+    def register(self, handler, filters=None, index=None):
+        super(IndexedHandler, self).register(handler, filters, index)
+        self.index.invalidate()
+
+    def unregister(self, handler):
+        # Handler.unregister сравнивает функцию с объектами обработчиков
+        # и никогда ее не находит
+        for handler_obj in self.handlers:
+            if handler_obj.handler is handler:
+                self.handlers.remove(handler_obj)
+                self.index.invalidate()
+                return True
+        raise ValueError("This handler is not registered!")
+
+    async def notify(self, *args):
+        """
+        То же, что `Handler.notify`, но обработчики берутся из индекса.
+        """
+        results = []
+
+        data = {}
+        ctx_data.set(data)
+
+        if self.middleware_key:
+            try:
+                await self.dispatcher.middleware.trigger(
+                    f"pre_process_{self.middleware_key}", args + (data,)
+                )
+            except CancelHandler:  # Событие отменено middleware
+                return results
+
+        try:
+            for handler_obj in self.index.candidates(args[0]):
+                try:
+                    data.update(await check_filters(handler_obj.filters, args))
+                except FilterNotPassed:
+                    continue
+                else:
+                    ctx_token = current_handler.set(handler_obj.handler)
+                    try:
+                        if self.middleware_key:
+                            await self.dispatcher.middleware.trigger(
+                                f"process_{self.middleware_key}", args + (data,)
+                            )
+                        partial_data = _check_spec(handler_obj.spec, data)
+                        response = await handler_obj.handler(*args, **partial_data)
+                        if response is not None:
+                            results.append(response)
+                        if self.once:
+                            break
+                    except SkipHandler:
+                        continue
+                    except CancelHandler:
+                        break
+                    finally:
+                        current_handler.reset(ctx_token)
+        finally:
+            if self.middleware_key:
+                await self.dispatcher.middleware.trigger(
+                    f"post_process_{self.middleware_key}", args + (results, data)
+                )
+
+        return results
+
+
+class IndexedDispatcher(Dispatcher):
+    """
+    Диспетчер, обработчики сообщений которого используют индекс команд.
+    """
+
+    def _setup_filters(self):
+        # Фильтры привязываются к объектам обработчиков,
+        # поэтому обработчики заменяются до привязки
+        self.message_handlers = IndexedHandler(self, middleware_key="message")
+        self.edited_message_handlers = IndexedHandler(
+            self, middleware_key="edited_message"
+        )
+        super(IndexedDispatcher, self)._setup_filters()
+
+
+def get_index(handler: Handler) -> CommandIndex | None:
+    """
+    :return: Индекс обработчиков или None, если он не используется.
+    """
+    return handler.index if isinstance(handler, IndexedHandler) else None
@@ -100,6 +100,7 @@ class InvalidArgumentsError(ParamsError):
         :param explanation: Дополнительная информация.
         :param handler: Обработчик команды.
         """
+        super(InvalidArgumentsError, self).__init__(explanation)
         self.explanation: str = f"\n{explanation.strip()}" if explanation else ""
         self.handler = handler or current_handler.get()
 
@@ -128,3 +129,12 @@ class CantRestrict(ModerationError):
     """
     Невозможно ограничить пользователя.
     """
+
+
+# HandlerTimeout
+
+
+class HandlerTimeout(CommandError):
+    """
+    Обработчик не уложился в отведенное время.
+    """
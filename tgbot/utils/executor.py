@@ -4,6 +4,9 @@
 
 """
 
+from __future__ import annotations
+
+import typing as ty
 from functools import partial
 
 from aiogram import Dispatcher
@@ -13,16 +16,29 @@ from loguru import logger
 from misc import dp
 from models.config import Config, WebhookConfig
 from models.db import db
+from utils import metrics
+from utils.logger import log_writer
+from utils.timer_queue import timers
+from utils.update_queue import update_queue
+from utils.write_behind import profile_writer
 
 runner = Executor(dp)
 
 
 async def on_startup_webhook(
-    dispatcher: Dispatcher, webhook_config: WebhookConfig
+    dispatcher: Dispatcher,
+    webhook_config: WebhookConfig,
+    allowed_updates: ty.Iterable[str] | None = None,
 ) -> None:
+    if not webhook_config.register_webhook:
+        return
     webhook_url = webhook_config.external_url
     logger.info("Configure Web-Hook URL to: {url}", url=webhook_url)
-    await dispatcher.bot.set_webhook(webhook_url)
+    await dispatcher.bot.set_webhook(
+        webhook_url,
+        max_connections=webhook_config.max_connections,
+        allowed_updates=list(allowed_updates) if allowed_updates is not None else None,
+    )
 
 
 async def on_startup_pooling(_: Dispatcher) -> None:
@@ -30,6 +46,7 @@ async def on_startup_pooling(_: Dispatcher) -> None:
 
 
 async def on_shutdown(_: Dispatcher) -> None:
+    metrics.log_metrics()
     logger.info("Bot shutdown")
 
 
@@ -40,11 +57,37 @@ def setup(config: Config) -> None:
     """
     logger.debug("Configure executor...")
 
+    update_queue.configure(
+        max_size=config.updates_queue_size,
+        high_water=config.updates_queue_high_water,
+        workers=config.updates_workers,
+        low_priority_max_delay=config.low_priority_max_delay,
+    )
+
+    profile_writer.configure(flush_interval=config.db.profile_flush_interval)
+
+    # Обработчики остановки вызываются в порядке добавления:
+    # принятые события должны быть обработаны, отложенные действия выполнены
+    # до закрытия сессии бота, а изменения профилей и логи записаны до отключения бд
+    runner.on_shutdown(update_queue.on_shutdown)
+    runner.on_shutdown(timers.on_shutdown)
+    runner.on_shutdown(profile_writer.on_shutdown)
+    runner.on_shutdown(on_shutdown)
+    runner.on_shutdown(log_writer.on_shutdown)
+
     db.setup(runner, config)  # Подключаем бд
 
     # Подключаем обработчики событий запуска и остановки бота
+    runner.on_startup(log_writer.on_startup)
+    runner.on_startup(profile_writer.on_startup)
+    runner.on_startup(timers.on_startup)
+    runner.on_startup(update_queue.on_startup)
     runner.on_startup(
-        partial(on_startup_webhook, webhook_config=config.webhook), polling=False
+        partial(
+            on_startup_webhook,
+            webhook_config=config.webhook,
+            allowed_updates=config.allowed_updates,
+        ),
+        polling=False,
     )
     runner.on_startup(on_startup_pooling, webhook=False)
-    runner.on_shutdown(on_shutdown)
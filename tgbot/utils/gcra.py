@@ -0,0 +1,117 @@
+"""
+
+Ограничение частоты вызовов по алгоритму GCRA (Generic Cell Rate Algorithm).
+Для каждого ключа хранится только время, с которого разрешен следующий вызов,
+и кол-во превышений подряд. Проверка выполняется за O(1).
+Ключ, время блокировки которого прошло, ничем не отличается от нового,
+поэтому такие ключи удаляются.
+
+"""
+
+from __future__ import annotations
+
+import time
+import typing as ty
+from collections import OrderedDict
+
+# Сколько устаревших ключей проверяется при каждом вызове
+EXPIRE_PER_CALL = 2
+
+
+class RateLimitResult(ty.NamedTuple):
+    """
+    Результат проверки вызова.
+    """
+
+    allowed: bool  # Вызов разрешен
+    retry_after: float  # Через сколько секунд будет разрешен следующий вызов
+    exceeded: int  # Кол-во запрещенных вызовов подряд, 0 для разрешенного
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты вызовов по ключам.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        """
+        :param maxsize: Максимальное кол-во ключей.
+            При переполнении удаляются давно использованные ключи.
+        """
+        self.maxsize = maxsize
+
+        self.allowed = 0
+        self.throttled = 0
+        self.expired = 0
+
+        # Ключ -> (время, с которого разрешен следующий вызов; кол-во превышений)
+        self._state: OrderedDict[ty.Hashable, tuple[float, int]] = OrderedDict()
+
+    def hit(
+        self, key: ty.Hashable, interval: float, burst: int = 1
+    ) -> RateLimitResult:
+        """
+        Проверяет вызов и учитывает его, если он разрешен.
+        :param key: Ключ.
+        :param interval: Минимальное время между вызовами (в секундах).
+        :param burst: Сколько вызовов подряд разрешено без ожидания.
+        :return: Результат проверки.
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        tat, exceeded = self._state.get(key, (now, 0))
+        tat = max(tat, now)
+        allow_at = tat - interval * (burst - 1)
+
+        if now < allow_at:
+            exceeded += 1
+            self._state[key] = (tat, exceeded)
+            self._state.move_to_end(key)
+            self.throttled += 1
+            return RateLimitResult(False, allow_at - now, exceeded)
+
+        self._state[key] = (tat + interval, 0)
+        self._state.move_to_end(key)
+        if len(self._state) > self.maxsize:
+            self._state.popitem(last=False)
+        self.allowed += 1
+        return RateLimitResult(True, 0.0, 0)
+
+    def exceeded(self, key: ty.Hashable) -> int:
+        """
+        :return: Кол-во запрещенных вызовов подряд.
+        """
+        return self._state.get(key, (0.0, 0))[1]
+
+    def reset(self, key: ty.Hashable) -> None:
+        """
+        Снимает ограничение с ключа.
+        """
+        self._state.pop(key, None)
+
+    def _expire(self, now: float) -> None:
+        # Ключи упорядочены по времени последнего вызова,
+        # поэтому устаревшие ключи находятся в начале
+        for _ in range(EXPIRE_PER_CALL):
+            if not self._state:
+                return
+            key, (tat, _) = next(iter(self._state.items()))
+            if tat > now:
+                return
+            del self._state[key]
+            self.expired += 1
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики ограничителя.
+        """
+        return dict(
+            keys=len(self._state),
+            allowed=self.allowed,
+            throttled=self.throttled,
+            expired=self.expired,
+        )
@@ -6,16 +6,17 @@ from dataclasses import dataclass
 
 from aiogram.dispatcher.handler import ctx_data
 
+from utils.args_cursor import ArgsCursor
 from utils.exceptions import (
     ParamsError,
     RequiredArgumentNotPassed,
 )
+from utils.lazy import resolve
 
 T = ty.TypeVar("T")
 
 if ty.TYPE_CHECKING:
     from aiogram.types import Message
-    from utils.safe_list import SafeList
 
 
 @dataclass
@@ -25,7 +26,32 @@ class CutterParsingResponse(ty.Generic[T]):
     """
 
     value: T  # Полученное значение
-    new_args: SafeList  # Новый список аргументов команды
+    new_args: ArgsCursor  # Курсор по оставшимся аргументам команды
+
+    def __post_init__(self):
+        # Сторонние катеры могут возвращать список аргументов
+        if not isinstance(self.new_args, ArgsCursor):
+            self.new_args = ArgsCursor(self.new_args)
+
+
+@dataclass(frozen=True)
+class CutterParsingFailure:
+    """
+    Неудачный результат работы синхронного катера.
+    Заменяет исключения при разборе аргументов.
+    """
+
+    not_passed: bool = False  # Аргумент не передан
+    text: str | None = None  # Описание ошибки
+
+    def to_exception(self) -> ParamsError:
+        if self.not_passed:
+            return RequiredArgumentNotPassed()
+        return ParamsError(self.text)
+
+
+NOT_PASSED = CutterParsingFailure(not_passed=True)
+INVALID = CutterParsingFailure()
 
 
 class Cutter(ABC):
@@ -34,19 +60,22 @@ class Cutter(ABC):
     Механизм сборки параметров для обработчика команды.
     """
 
-    async def get(self, message: Message, args: SafeList) -> CutterParsingResponse:
+    # Катер может быть вызван синхронно методом `parse` (см. SyncCutter)
+    is_sync: bool = False
+
+    async def get(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
         try:
             return await self._get(message, args)
         except ValueError:
             raise ParamsError
 
     @abstractmethod
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
+    async def _get(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
         """
         Вызов катера.
         Метод должен быть переопределен в наследуемом классе.
         :type message: Message.
-        :type args: SafeList.
+        :type args: ArgsCursor.
         :return: CutterParsingResponse.
         """
 
@@ -64,10 +93,38 @@ class Cutter(ABC):
         return repr(self)
 
 
+class SyncCutter(Cutter, ABC):
+    """
+    Базовый синхронный катер.
+    Значение получается без обращения к бд и api.
+    """
+
+    is_sync = True
+
+    @abstractmethod
+    def parse(
+        self, message: Message, args: ArgsCursor
+    ) -> CutterParsingResponse | CutterParsingFailure:
+        """
+        Синхронный вызов катера.
+        Метод должен быть переопределен в наследуемом классе.
+        :type message: Message.
+        :type args: ArgsCursor.
+        :return: CutterParsingResponse или CutterParsingFailure.
+        """
+
+    async def _get(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
+        result = self.parse(message, args)
+        if isinstance(result, CutterParsingFailure):
+            raise result.to_exception()
+        return result
+
+
 class CtxDataCutter(Cutter, ABC):
     """
     Базовый катер данных из контекста команды.
     Значение получается из контекста текущей команды.
+    Ленивые значения (utils.lazy) получаются при разборе параметров.
     """
 
     @property
@@ -80,8 +137,8 @@ class CtxDataCutter(Cutter, ABC):
             f"В катере {self} не определено название переменной контекста"
         )
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
-        return CutterParsingResponse(ctx_data.get()[self.var_name], args)
+    async def _get(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
+        return CutterParsingResponse(await resolve(ctx_data.get()[self.var_name]), args)
 
 
 class TextArgumentCutter(Cutter, ABC):
@@ -90,16 +147,16 @@ class TextArgumentCutter(Cutter, ABC):
     Значение получается из строки, введенной пользователем.
     """
 
-    async def get(self, message: Message, args: SafeList) -> CutterParsingResponse:
+    async def get(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
         """
         :raises RequiredArgumentNotPassed
         """
-        if args[0] is None:
+        if not args:
             raise RequiredArgumentNotPassed
         return await super(TextArgumentCutter, self).get(message, args)
 
 
-class BaseTypeCutter(TextArgumentCutter, ABC):
+class BaseTypeCutter(SyncCutter, TextArgumentCutter, ABC):
     """
     Базовый катер текстового аргумента питоновского типа.
     Значение получается из строки, введенной пользователем.
@@ -109,8 +166,15 @@ class BaseTypeCutter(TextArgumentCutter, ABC):
     # Должно быть изменено в наследуемом классе
     factory: ty.Any
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
-        return CutterParsingResponse(self.factory(args[0]), args[1:])
+    def parse(
+        self, message: Message, args: ArgsCursor
+    ) -> CutterParsingResponse | CutterParsingFailure:
+        if (arg := args.peek()) is None:
+            return NOT_PASSED
+        try:
+            return CutterParsingResponse(self.factory(arg), args.advance())
+        except ValueError:
+            return INVALID
 
 
 class HandlerParam(ty.NamedTuple):
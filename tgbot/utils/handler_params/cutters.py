@@ -3,24 +3,28 @@ from __future__ import annotations
 import typing as ty
 
 from services.find_target_user import get_target_user, get_db_user_by_tg_user
-from utils.exceptions import ParamsError, RequiredArgumentNotPassed
-from utils.timedelta_functions import timedelta, parse_timedelta_from_text
+from utils.exceptions import ParamsError, RequiredArgumentNotPassed, TimedeltaParseError
+from utils.timedelta_functions import timedelta, parse_timedelta_from_args
 from .base import (
     Cutter,
+    SyncCutter,
     CtxDataCutter,
     TextArgumentCutter,
     BaseTypeCutter,
     CutterParsingResponse,
+    CutterParsingFailure,
+    NOT_PASSED,
+    INVALID,
 )
 
 T = ty.TypeVar("T")
 
 if ty.TYPE_CHECKING:
     from aiogram.types import Message
-    from utils.safe_list import SafeList
+    from utils.args_cursor import ArgsCursor
 
 
-class MessageCutter(Cutter):
+class MessageCutter(SyncCutter):
     """
     Катер сообщения.
     Ussage:
@@ -30,7 +34,7 @@ class MessageCutter(Cutter):
         ... async def handler(message: Message): ...
     """
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
+    def parse(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
         return CutterParsingResponse(message, args)
 
 
@@ -101,7 +105,7 @@ class WordCutter(BaseTypeCutter):
     factory = str
 
 
-class StringCutter(TextArgumentCutter):
+class StringCutter(SyncCutter, TextArgumentCutter):
     """
     Текстовый аргумент.
     Забирает все оставшиеся аргументы команды.
@@ -113,8 +117,12 @@ class StringCutter(TextArgumentCutter):
         ...     # StringCutter достигается обозначением KEYWORD_ONLY
     """
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
-        return CutterParsingResponse(" ".join(args), args.cleared())
+    def parse(
+        self, message: Message, args: ArgsCursor
+    ) -> CutterParsingResponse | CutterParsingFailure:
+        if not args:
+            return NOT_PASSED
+        return CutterParsingResponse(" ".join(args), args.exhausted())
 
 
 class OptionalCutter(Cutter):
@@ -143,15 +151,29 @@ class OptionalCutter(Cutter):
         self._default_factory = default_factory
         self._arg_type = arg_type
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
+    @property
+    def is_sync(self) -> bool:
+        return self._arg_type.is_sync
+
+    async def _get(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
         try:
             return await self._arg_type.get(message, args)
         except RequiredArgumentNotPassed:
-            if self._default_factory is not None:
-                return CutterParsingResponse(self._default_factory(), args)
-            else:
-                # `None` или установленное значение
-                return CutterParsingResponse(self._default, args)
+            return self._make_default(args)
+
+    def parse(
+        self, message: Message, args: ArgsCursor
+    ) -> CutterParsingResponse | CutterParsingFailure:
+        result = self._arg_type.parse(message, args)
+        if isinstance(result, CutterParsingFailure) and result.not_passed:
+            return self._make_default(args)
+        return result
+
+    def _make_default(self, args: ArgsCursor) -> CutterParsingResponse:
+        if self._default_factory is not None:
+            return CutterParsingResponse(self._default_factory(), args)
+        # `None` или установленное значение
+        return CutterParsingResponse(self._default, args)
 
     def __repr__(self):
         return f"<{self.__class__.__name__} ({self._arg_type!r})>"
@@ -181,7 +203,11 @@ class UnionCutter(TextArgumentCutter):
     def __init__(self, *arg_types: Cutter):
         self._arg_types = arg_types
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
+    @property
+    def is_sync(self) -> bool:
+        return all(arg_type.is_sync for arg_type in self._arg_types)
+
+    async def _get(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
         for arg_type in self._arg_types:
             try:
                 parsed_value = await arg_type.get(message, args)
@@ -192,6 +218,17 @@ class UnionCutter(TextArgumentCutter):
 
         raise ParamsError
 
+    def parse(
+        self, message: Message, args: ArgsCursor
+    ) -> CutterParsingResponse | CutterParsingFailure:
+        if not args:
+            return NOT_PASSED
+        for arg_type in self._arg_types:
+            result = arg_type.parse(message, args)
+            if not isinstance(result, CutterParsingFailure):
+                return result
+        return INVALID
+
     def __repr__(self):
         return f"<{self.__class__.__name__} ({' | '.join(map(repr, self._arg_types))})>"
 
@@ -199,12 +236,13 @@ class UnionCutter(TextArgumentCutter):
         if format_spec == "colored":
             return (
                 f"<lc><{self.__class__.__name__}</lc> "
-                f"({' | '.join(map(str, f'{self._arg_types:colored}'))})<lc>></lc>"
+                f"({' | '.join(f'{arg_type:colored}' for arg_type in self._arg_types)})"
+                f"<lc>></lc>"
             )
         return repr(self)
 
 
-class LiteralCutter(TextArgumentCutter):
+class LiteralCutter(SyncCutter, TextArgumentCutter):
     """
     Аргумент с определенным значением.
     Ussage:
@@ -217,12 +255,15 @@ class LiteralCutter(TextArgumentCutter):
     def __init__(self, *container_values: str):
         self._container_values = container_values
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
+    def parse(
+        self, message: Message, args: ArgsCursor
+    ) -> CutterParsingResponse | CutterParsingFailure:
+        if (arg := args.peek()) is None:
+            return NOT_PASSED
         for value in self._container_values:
-            if args[0] == value:
-                return CutterParsingResponse(value, args[1:])
-
-        raise ParamsError
+            if arg == value:
+                return CutterParsingResponse(value, args.advance())
+        return INVALID
 
     def __repr__(self):
         return f"<{self.__class__.__name__} ({' | '.join(self._container_values)})>"
@@ -231,12 +272,12 @@ class LiteralCutter(TextArgumentCutter):
         if format_spec == "colored":
             return (
                 f"<lc><{self.__class__.__name__}</lc> "
-                f"({' | '.join(map(repr, f'{self._container_values:colored}'))})<lc>></lc>"
+                f"({' | '.join(map(repr, self._container_values))})<lc>></lc>"
             )
         return repr(self)
 
 
-class Timedelta(TextArgumentCutter, timedelta):
+class Timedelta(SyncCutter, TextArgumentCutter, timedelta):
     """
     Аргумент с временным отрезком.
     Ussage:
@@ -246,11 +287,18 @@ class Timedelta(TextArgumentCutter, timedelta):
         ... async def handler(duration: Timedelta): ...
     """
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
-        duration, match = parse_timedelta_from_text(
-            line if (line := " ".join(args)) else None
-        )
-        return CutterParsingResponse(duration, args[len(match.string.split()) :])
+    def parse(
+        self, message: Message, args: ArgsCursor
+    ) -> CutterParsingResponse | CutterParsingFailure:
+        if not args:
+            return NOT_PASSED
+        try:
+            duration, consumed = parse_timedelta_from_args(args)
+        except TimedeltaParseError as e:
+            return CutterParsingFailure(text=e.text)
+        except ValueError:
+            return INVALID
+        return CutterParsingResponse(duration, args.advance(consumed))
 
 
 class TargetCutter(Cutter):
@@ -277,7 +325,7 @@ class TargetCutter(Cutter):
     def __init__(self, can_be_bot: bool = True):
         self.can_be_bot = can_be_bot
 
-    async def _get(self, message: Message, args: SafeList) -> CutterParsingResponse:
+    async def _get(self, message: Message, args: ArgsCursor) -> CutterParsingResponse:
         getting_response = get_target_user(message, args, self.can_be_bot)
         if getting_response is None:
             raise RequiredArgumentNotPassed
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import typing as ty
+
+from aiogram.utils.markdown import hbold
+from loguru import logger
+
+from utils.exceptions import (
+    InvalidArgumentsError,
+    ParamsError,
+    RequiredArgumentNotPassed,
+    TimedeltaParseError,
+)
+from utils.logger import trace_enabled
+from utils.args_cursor import ArgsCursor
+from .base import CutterParsingFailure, NOT_PASSED
+
+if ty.TYPE_CHECKING:
+    from aiogram.types import Message
+    from .base import Cutter, HandlerParam, Param
+
+
+class _Step(ty.NamedTuple):
+    """
+    Шаг разбора параметров.
+    """
+
+    param_name: str
+    cutter: Cutter
+    is_sync: bool
+    param_settings: Param
+
+
+class HandlerParamsParser:
+    """
+    Скомпилированный план разбора параметров обработчика.
+    Синхронные катеры вызываются без await и исключений,
+    асинхронно вызываются только катеры, обращающиеся к бд.
+    """
+
+    def __init__(self, handler_name: str, params: list[HandlerParam]):
+        """
+        :param handler_name: Название обработчика.
+        :param params: Параметры обработчика.
+        """
+        self.handler_name = handler_name
+        self._steps = tuple(
+            _Step(
+                param_name=param.param_name,
+                cutter=param.cutter,
+                is_sync=param.cutter.is_sync,
+                param_settings=param.param_settings,
+            )
+            for param in params
+        )
+
+        # Шаблон TRACE сообщения собирается один раз и не содержит разметки:
+        # loguru разбирает теги при каждом вызове с colors=True
+        fields = ", ".join(
+            f"{step.param_name}={{{step.param_name}}}" for step in self._steps
+        )
+        self._trace_template = (
+            f"Making params for handler {handler_name} finished: {{{{{fields}}}}}"
+        )
+
+    async def parse(self, message: Message) -> dict[str, ty.Any]:
+        """
+        Сбор параметров для обработчика.
+        :param message: Сообщение.
+        :return: Параметры, которые нужно передать в обработчик.
+        """
+        params: dict[str, ty.Any] = {}
+        args = ArgsCursor.from_text(message.get_args())  # Текстовые аргументы от пользователя
+
+        for step in self._steps:
+            if step.is_sync:
+                result = step.cutter.parse(message, args)
+            else:
+                result = await self._get(step.cutter, message, args)
+
+            if isinstance(result, CutterParsingFailure):
+                raise _make_invalid_arguments_error(step.param_settings, result)
+
+            args = result.new_args
+            params[step.param_name] = result.value
+
+        if trace_enabled():
+            logger.trace(self._trace_template, **params)
+
+        # Если остались лишние аргументы
+        if len(args) > 0:
+            raise InvalidArgumentsError
+
+        return params
+
+    @staticmethod
+    async def _get(cutter: Cutter, message: Message, args: ArgsCursor):
+        """
+        Вызов асинхронного катера.
+        Исключения катера превращаются в CutterParsingFailure.
+        """
+        try:
+            return await cutter.get(message, args)
+        except RequiredArgumentNotPassed:
+            return NOT_PASSED
+        except (ParamsError, TimedeltaParseError) as e:
+            return CutterParsingFailure(text=e.text)
+
+
+def _make_invalid_arguments_error(
+    param_settings: Param, failure: CutterParsingFailure
+) -> InvalidArgumentsError:
+    # Если не указано название параметра, то не показываем объяснение
+    if not param_settings.name:
+        return InvalidArgumentsError()
+
+    if failure.not_passed:
+        return InvalidArgumentsError(
+            "Не передано значение для обязательного параметра "
+            f"{hbold(param_settings.name)}.{param_settings.description}"
+        )
+    return InvalidArgumentsError(
+        "Некорректное значение для параметра "
+        f"{hbold(param_settings.name)}.{param_settings.description} "
+        f"{failure.text if failure.text else ''}"
+    )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+import typing as ty
+from functools import wraps
+
+from utils import metrics
+from utils.exceptions import HandlerTimeout
+
+T = ty.TypeVar("T")
+
+# Кол-во обработчиков, прерванных по времени
+_timed_out = 0
+
+
+def handler_timeout(seconds: float) -> ty.Callable[[T], T]:
+    """
+    Декоратор, ограничивающий время работы обработчика.
+    Если обработчик не уложился, он отменяется и вызывается HandlerTimeout.
+    :param seconds: Сколько секунд может работать обработчик.
+    :return: Декоратор.
+    """
+
+    def _decorator(func: T) -> T:
+        @wraps(func)
+        async def _wrapper(*args, **kwargs):
+            global _timed_out
+            try:
+                # Благодаря wraps aiogram передает только нужные обработчику данные
+                return await asyncio.wait_for(func(*args, **kwargs), seconds)
+            except asyncio.TimeoutError as e:
+                _timed_out += 1
+                raise HandlerTimeout(
+                    f"Handler {func.__name__} timed out after {seconds}s",
+                    origin_exception=e,
+                )
+
+        return _wrapper
+
+    return _decorator
+
+
+def stats() -> dict[str, int]:
+    """
+    :return: Счетчики прерванных обработчиков.
+    """
+    return dict(timed_out=_timed_out)
+
+
+metrics.register("handler_timeout", stats)
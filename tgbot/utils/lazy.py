@@ -0,0 +1,60 @@
+"""
+
+Ленивые значения.
+Значение получается только при первом await и затем запоминается.
+
+"""
+
+from __future__ import annotations
+
+import typing as ty
+
+T = ty.TypeVar("T")
+
+_NOT_RESOLVED = object()
+
+
+class Lazy(ty.Generic[T]):
+    """
+    Значение, которое получается при первом обращении.
+    Usage:
+        >>> user = Lazy(lambda: User.get(user_id=1))
+        >>> await user  # Запрос к бд
+        >>> await user  # Сохраненное значение
+    """
+
+    __slots__ = ("_factory", "_value")
+
+    def __init__(self, factory: ty.Callable[[], ty.Awaitable[T]]):
+        """
+        :param factory: Функция, возвращающая значение.
+        """
+        self._factory = factory
+        self._value: T | object = _NOT_RESOLVED
+
+    @property
+    def resolved(self) -> bool:
+        return self._value is not _NOT_RESOLVED
+
+    async def get(self) -> T:
+        if self._value is _NOT_RESOLVED:
+            self._value = await self._factory()
+            self._factory = None  # Замыкание больше не нужно
+        return self._value
+
+    def __await__(self) -> ty.Generator[ty.Any, None, T]:
+        return self.get().__await__()
+
+    def __repr__(self):
+        if self.resolved:
+            return f"<{self.__class__.__name__} {self._value!r}>"
+        return f"<{self.__class__.__name__} not resolved>"
+
+
+async def resolve(value: Lazy[T] | T) -> T:
+    """
+    :return: Значение ленивого значения или само значение.
+    """
+    if isinstance(value, Lazy):
+        return await value
+    return value
@@ -1,43 +1,228 @@
+"""
+
+Блокировки по ключу.
+Внутри процесса используются asyncio.Lock, а между процессами
+дополнительно используется выбранный в конфигурации бэкенд:
+memory - блокировки только внутри процесса,
+file - блокировки участков общего файла (fcntl), работает без отдельного сервиса.
+Блокировки по ключу используются только для получения или создания записей
+в бд без поддержки upsert (models.db.upsert, sqlite до 3.35).
+Бэкенд file нужен, только если с такой бд работают несколько процессов
+бота (режим с несколькими процессами utils.workers).
+
+"""
+
 from __future__ import annotations
 
 import asyncio
+import errno
+import hashlib
+import os
 import typing as ty
+from enum import Enum
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+if ty.TYPE_CHECKING:
+    from models.config import Config
+
+# Пауза между попытками получить блокировку файла (в секундах)
+FILE_LOCK_MIN_DELAY = 0.005
+FILE_LOCK_MAX_DELAY = 0.1
+
+
+class LockBackendType(str, Enum):
+    """
+    Бэкенды блокировок между процессами.
+    """
+
+    memory = "memory"  # Только внутри процесса
+    file = "file"  # Блокировки участков общего файла
+
+
+class MemoryLockBackend:
+    """
+    Бэкенд без блокировок между процессами.
+    """
+
+    async def acquire(self, key: ty.Hashable) -> None:
+        pass
+
+    def release(self, key: ty.Hashable) -> None:
+        pass
+
+
+class FileLockBackend:
+    """
+    Блокировки между процессами через блокировку байта общего файла.
+    Байт выбирается по хэшу ключа, поэтому файл остается пустым.
+    Блокировки процесса снимаются системой, даже если процесс упал.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """
+        :param path: Путь к файлу блокировок.
+        """
+        if fcntl is None:
+            raise RuntimeError("File lock backend is not supported on this platform")
+        self.path = path
+        self._fd: int | None = None
+
+    @staticmethod
+    def _offset(key: ty.Hashable) -> int:
+        # hash() строк отличается в разных процессах
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") >> 2  # Смещение должно влезать в off_t
+
+    def _fileno(self) -> int:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    async def acquire(self, key: ty.Hashable) -> None:
+        offset = self._offset(key)
+        delay = FILE_LOCK_MIN_DELAY
+        flags = fcntl.LOCK_EX | fcntl.LOCK_NB
+        while True:
+            try:
+                fcntl.lockf(self._fileno(), flags, 1, offset, os.SEEK_SET)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EACCES, errno.EAGAIN):
+                    raise
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, FILE_LOCK_MAX_DELAY)
 
-from loguru import logger
+    def release(self, key: ty.Hashable) -> None:
+        fcntl.lockf(self._fileno(), fcntl.LOCK_UN, 1, self._offset(key), os.SEEK_SET)
+
+
+LockBackend = ty.Union[MemoryLockBackend, FileLockBackend]
+
+# Бэкенд всех LockFactory, устанавливается при настройке бота
+_backend: LockBackend = MemoryLockBackend()
+
+
+class _Entry:
+    """
+    Блокировка ключа и кол-во задач, которые ее держат или ждут.
+    """
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class KeyLock:
+    """
+    Блокировка одного ключа.
+    Используется как асинхронный контекстный менеджер.
+    """
+
+    __slots__ = ("_factory", "_key", "_entry")
+
+    def __init__(self, factory: LockFactory, key: ty.Hashable):
+        self._factory = factory
+        self._key = key
+        self._entry: _Entry | None = None
+
+    async def __aenter__(self) -> None:
+        entry = self._factory._retain(self._key)
+        try:
+            await entry.lock.acquire()
+            try:
+                # Ключ уже заблокирован внутри процесса, блокируем между процессами
+                await _backend.acquire(self._key)
+            except BaseException:
+                entry.lock.release()
+                raise
+        except BaseException:
+            self._factory._release(self._key, entry)
+            raise
+        self._entry = entry
+
+    async def __aexit__(self, *_) -> None:
+        entry, self._entry = self._entry, None
+        try:
+            _backend.release(self._key)
+        finally:
+            entry.lock.release()
+            self._factory._release(self._key, entry)
+
+    def locked(self) -> bool:
+        return self._factory.locked(self._key)
 
 
 class LockFactory:
     """
-    Утилита для блокировки потока.
+    Утилита для блокировки потока по ключу.
+    Блокирует ключ и в других процессах, если выбран бэкенд file.
+    Блокировка ключа существует, только пока ее держат или ждут,
+    поэтому память занимают только используемые сейчас ключи
+    и периодическая очистка не нужна.
     """
 
     def __init__(self):
-        self._locks: ty.Dict[ty.Any, asyncio.Lock] | None = None
+        self._locks: dict[ty.Hashable, _Entry] = {}
 
-    def get_lock(self, id_: ty.Any) -> asyncio.Lock:
-        if self._locks is None:
-            self._locks = {}
+        self.acquired = 0
+        self.contended = 0  # Сколько раз пришлось ждать освобождения ключа
+        self.max_size = 0
 
-            # Это костыль, по хорошему эта таска должна создаваться в ините,
-            # для этого милваря должна создаваться после бота и диспетчера
-            asyncio.create_task(self._check_and_clear())
+    def get_lock(self, id_: ty.Hashable) -> KeyLock:
+        """
+        :param id_: Ключ.
+        :return: Блокировка ключа.
+        """
+        return KeyLock(self, id_)
 
-        return self._locks.setdefault(id_, asyncio.Lock())
+    def locked(self, id_: ty.Hashable) -> bool:
+        entry = self._locks.get(id_)
+        return entry is not None and entry.lock.locked()
 
-    def clear(self) -> None:
-        if self._locks is None:
-            return
-        self._locks.clear()
+    def _retain(self, id_: ty.Hashable) -> _Entry:
+        if (entry := self._locks.get(id_)) is None:
+            entry = self._locks[id_] = _Entry()
+            self.max_size = max(self.max_size, len(self._locks))
+        elif entry.lock.locked():
+            self.contended += 1
+        entry.users += 1
+        self.acquired += 1
+        return entry
 
-    def clear_free(self) -> None:
-        if self._locks is None:
-            return
-        to_remove = [key for key, lock in self._locks.items() if not lock.locked()]
-        for key in to_remove:
-            del self._locks[key]
-            logger.trace("remove lock for {key}", key=key)
+    def _release(self, id_: ty.Hashable, entry: _Entry) -> None:
+        entry.users -= 1
+        if entry.users == 0:
+            del self._locks[id_]
 
-    async def _check_and_clear(self, cool_down: int = 1800) -> ty.NoReturn:
-        while True:
-            await asyncio.sleep(cool_down)
-            self.clear_free()
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики блокировок.
+        """
+        return dict(
+            size=len(self._locks),
+            max_size=self.max_size,
+            acquired=self.acquired,
+            contended=self.contended,
+        )
+
+
+def setup(config: Config) -> None:
+    """
+    Выбор бэкенда блокировок между процессами.
+    :param config: Текущая конфигурация.
+    """
+    global _backend
+    backend_type = LockBackendType(config.lock_backend)
+    if backend_type == LockBackendType.file:
+        _backend = FileLockBackend(config.lock_file)
+    else:
+        _backend = MemoryLockBackend()
@@ -0,0 +1,171 @@
+"""
+
+Буферизированная запись логов в бд.
+Записи накапливаются в очереди и сохраняются пачками через `bulk_create`.
+Запись в очередь синхронная и не может ждать, поэтому при политике `block`
+записи, не поместившиеся в очередь, ждут в резервной очереди того же размера,
+а при ее переполнении отбрасываются.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import typing as ty
+from collections import deque
+from enum import Enum
+
+from models.db import Log
+
+if ty.TYPE_CHECKING:
+    from aiogram import Dispatcher
+
+
+class OverflowPolicy(str, Enum):
+    """
+    Поведение при переполнении очереди.
+    """
+
+    drop_oldest = "drop_oldest"  # Удалить самую старую запись
+    drop_newest = "drop_newest"  # Не добавлять новую запись
+    block = "block"  # Ждать освобождения места в ограниченной резервной очереди
+
+
+class LogWriter:
+    """
+    Очередь записи логов в бд.
+    Сбрасывается, когда набирается `batch_size` записей или проходит `flush_interval`.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        overflow_policy: OverflowPolicy = OverflowPolicy.drop_oldest,
+    ):
+        """
+        :param max_size: Максимальный размер очереди.
+        :param batch_size: Кол-во записей, сохраняемых за один запрос.
+        :param flush_interval: Максимальное время ожидания записи (в секундах).
+        :param overflow_policy: Поведение при переполнении очереди.
+        """
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._queue: deque[Log] = deque()
+        # Записи, ждущие места в очереди при политике `block`
+        self._reserve: deque[Log] = deque()
+        self._flush_needed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    def configure(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow_policy: OverflowPolicy,
+    ) -> None:
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+
+    def full(self) -> bool:
+        return len(self._queue) >= self.max_size
+
+    def write(self, record: Log) -> bool:
+        """
+        Добавляет запись в очередь, не блокируя поток.
+        При политике `block` и переполненной очереди запись ждет
+        в резервной очереди и будет добавлена, когда освободится место.
+        :return: False, если запись была отброшена.
+        """
+        if self.full() or self._reserve:
+            if self.overflow_policy == OverflowPolicy.block:
+                return self._write_reserve(record)
+            self.dropped += 1
+            if self.overflow_policy == OverflowPolicy.drop_newest:
+                return False
+            self._queue.popleft()
+
+        self._queue.append(record)
+        if len(self._queue) >= self.batch_size:
+            self._flush_needed.set()
+        return True
+
+    def _write_reserve(self, record: Log) -> bool:
+        self._flush_needed.set()
+        if len(self._reserve) >= self.max_size:
+            self.dropped += 1
+            return False
+        self._reserve.append(record)
+        return True
+
+    def _refill(self) -> None:
+        # Записи из резерва переносятся в порядке добавления
+        while self._reserve and not self.full():
+            self._queue.append(self._reserve.popleft())
+
+    async def flush(self) -> None:
+        """
+        Сохраняет все записи из очереди.
+        """
+        self._flush_needed.clear()
+        while self._queue:
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(self.batch_size, len(self._queue)))
+            ]
+            self._refill()
+            try:
+                await Log.bulk_create(batch)
+            except Exception as e:
+                # Логер здесь использовать нельзя: запись снова попадет в очередь
+                self.failed += len(batch)
+                sys.stderr.write(f"Failed to write {len(batch)} logs to db: {e!r}\n")
+            else:
+                self.written += len(batch)
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(
+                    self._flush_needed.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def on_startup(self, _: Dispatcher) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def on_shutdown(self, _: Dispatcher) -> None:
+        # Даем фоновой задаче завершить текущую запись
+        self._closed = True
+        self._flush_needed.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+        await self.flush()
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики очереди.
+        """
+        return dict(
+            queue_size=len(self._queue),
+            reserve_size=len(self._reserve),
+            written=self.written,
+            dropped=self.dropped,
+            failed=self.failed,
+        )
@@ -7,19 +7,40 @@
 
 from __future__ import annotations
 
-import re
 import sys
+import traceback
 import typing as ty
-from logging import Handler
 
 from loguru import logger
 
 from models.db import Log
+from utils import metrics
+from utils.log_writer import LogWriter, OverflowPolicy
 
 if ty.TYPE_CHECKING:
-    from logging import LogRecord
+    from loguru import Message
     from models.config import Config
 
+log_writer = LogWriter()
+metrics.register("log_writer", log_writer.stats)
+
+# Выводятся ли TRACE записи. До настройки логера выводятся все записи
+_trace_enabled = True
+
+
+def trace_enabled() -> bool:
+    """
+    Проверка перед сборкой TRACE сообщения.
+    Если уровень выключен, сообщение не нужно даже форматировать.
+    """
+    return _trace_enabled
+
+
+def _update_trace_enabled(level: str | int) -> None:
+    global _trace_enabled
+    level_no = level if isinstance(level, int) else logger.level(level).no
+    _trace_enabled = level_no <= logger.level("TRACE").no
+
 
 def formatter(_) -> str:
     """
@@ -44,15 +65,23 @@ def setup_stdout_logger(config: Config) -> None:
         format=formatter,
         level=config.logging.logging_level,
     )
+    # В бд TRACE записи не попадают, поэтому уровень определяется консолью
+    _update_trace_enabled(config.logging.logging_level)
 
 
-def setup_db_logger() -> None:
+def setup_db_logger(config: Config) -> None:
     """
     Логер, сохраняющий логи в бд.
     """
+    log_writer.configure(
+        max_size=config.logging.logging_db_queue_size,
+        batch_size=config.logging.logging_db_batch_size,
+        flush_interval=config.logging.logging_db_flush_interval,
+        overflow_policy=OverflowPolicy(config.logging.logging_db_overflow_policy),
+    )
     logger.add(
-        DBLoggerHandler(),
-        format=formatter,
+        db_log_sink,
+        format="{message}",  # Строка не используется, данные берутся из записи
         level="INFO",  # В бд не будет TRACE и DEBUG логов
     )
 
@@ -64,6 +93,7 @@ def update_logging_level(sink: ty.Any, level: str) -> None:
     :param level: Уровень.
     """
     logger.configure(handlers=[dict(sink=sink, level=level)])
+    _update_trace_enabled(level)
 
 
 def update_stdout_logging_level(level: str) -> None:
@@ -79,24 +109,36 @@ def update_db_logging_level(level: str) -> None:
     Изменение уровня логирования в бд.
     :param level: Уровень.
     """
-    update_logging_level(DBLoggerHandler, level)
+    update_logging_level(db_log_sink, level)
 
 
-class DBLoggerHandler(Handler):
+class DBLogSink:
     """
     БД логер.
+    Данные берутся напрямую из записи loguru, без разбора отформатированной строки.
     """
 
-    def emit(self, record: LogRecord) -> None:
-        message = record.getMessage().strip()
-        if match := re.fullmatch(
-            r"\[(?P<lvl>.+?) (?P<date>.+?)]: (?P<msg>.+)", message, flags=re.DOTALL
-        ):
-            level, date, msg = map(
-                str.strip, (match.group("lvl"), match.group("date"), match.group("msg"))
+    def __call__(self, message: Message) -> None:
+        record = message.record
+        msg = record["message"].strip()
+        if exception := record["exception"]:
+            msg += "\n" + "".join(
+                traceback.format_exception(
+                    exception.type, exception.value, exception.traceback
+                )
             )
-            extra = record.extra.get("extra") if hasattr(record, "extra") else None
-            Log.add(level=level, msg=msg, date=date, extra=extra)
+
+        log_writer.write(
+            Log(
+                level=record["level"].name[0],
+                msg=msg,
+                date=record["time"].replace(tzinfo=None),  # Локальное время
+                extra=record["extra"].get("extra"),
+            )
+        )
+
+
+db_log_sink = DBLogSink()
 
 
 def setup_logger(config) -> None:
@@ -108,7 +150,7 @@ def setup_logger(config) -> None:
     logger.remove(0)
 
     setup_stdout_logger(config)
-    setup_db_logger()
+    setup_db_logger(config)
 
     # Настройка цветов и создание новых уровней логирования
     logger.level("DEBUG", color="<lk>")
@@ -0,0 +1,42 @@
+"""
+
+Сбор метрик работы бота.
+Компоненты регистрируют функции, возвращающие свои счетчики.
+
+"""
+
+from __future__ import annotations
+
+import typing as ty
+
+from loguru import logger
+
+_providers: dict[str, ty.Callable[[], dict[str, ty.Any]]] = {}
+
+
+def register(name: str, provider: ty.Callable[[], dict[str, ty.Any]]) -> None:
+    """
+    Регистрация источника метрик.
+    :param name: Название компонента.
+    :param provider: Функция, возвращающая словарь счетчиков.
+    """
+    _providers[name] = provider
+
+
+def collect() -> dict[str, dict[str, ty.Any]]:
+    """
+    :return: Текущие значения всех метрик.
+    """
+    return {name: provider() for name, provider in _providers.items()}
+
+
+def log_metrics() -> None:
+    """
+    Вывод всех метрик в лог.
+    """
+    for name, values in collect().items():
+        logger.info(
+            "Metrics {name}: {values}",
+            name=name,
+            values=", ".join(f"{key}={value}" for key, value in values.items()),
+        )
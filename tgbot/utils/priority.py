@@ -0,0 +1,79 @@
+"""
+
+Классы приоритета обработчиков.
+При нагрузке планировщик (utils.update_queue) сначала обрабатывает
+события более высоких классов, а события низкого класса,
+слишком долго ждавшие в очереди, отбрасывает.
+
+"""
+
+from __future__ import annotations
+
+import typing as ty
+from enum import IntEnum
+
+from aiogram import types
+
+from utils import command_index
+
+if ty.TYPE_CHECKING:
+    from aiogram import Dispatcher
+
+T = ty.TypeVar("T")
+
+
+class Priority(IntEnum):
+    """
+    Классы приоритета. Чем меньше значение, тем раньше обрабатывается событие.
+    """
+
+    high = 0  # Модерация
+    normal = 1  # Обработчики без явного приоритета
+    low = 2  # Развлечения, могут быть отброшены при нагрузке
+
+
+def priority(level: Priority, silent: bool = False) -> ty.Callable[[T], T]:
+    """
+    Декоратор для настройки приоритета команды.
+    :param level: Класс приоритета.
+    :param silent: Отбрасывать событие без ответа пользователю.
+    :return: Декоратор.
+    """
+
+    def _decorator(func: T) -> T:
+        setattr(func, "update_priority", level)
+        setattr(func, "update_priority_silent", silent)
+        return func
+
+    return _decorator
+
+
+def get_update_priority(
+    dispatcher: Dispatcher, update: types.Update
+) -> tuple[Priority, bool]:
+    """
+    Определяет приоритет события по обработчикам его команды.
+    Фильтры не проверяются, поэтому если команду могут обработать
+    несколько обработчиков, выбирается наибольший приоритет.
+    :return: Класс приоритета и нужно ли отбрасывать событие без ответа.
+    """
+    if update.message:
+        handler = dispatcher.message_handlers
+        message = update.message
+    elif update.edited_message:
+        handler = dispatcher.edited_message_handlers
+        message = update.edited_message
+    else:
+        return Priority.normal, False
+
+    index = command_index.get_index(handler)
+    if index is None or index.get_command(message) is None:
+        return Priority.normal, False
+
+    result: tuple[Priority, bool] | None = None
+    for handler_obj in index.candidates(message):
+        level = getattr(handler_obj.handler, "update_priority", None)
+        if level is not None and (result is None or level < result[0]):
+            silent = getattr(handler_obj.handler, "update_priority_silent", False)
+            result = level, silent
+    return result or (Priority.normal, False)
@@ -0,0 +1,60 @@
+"""
+
+Объединение одинаковых одновременных запросов.
+Пока запрос выполняется, повторные вызовы с тем же ключом
+ждут его результат вместо нового запроса.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import typing as ty
+
+T = ty.TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Группа одновременных вызовов.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: dict[ty.Hashable, asyncio.Future] = {}
+
+    async def do(self, key: ty.Hashable, func: ty.Callable[[], ty.Awaitable[T]]) -> T:
+        """
+        Выполняет `func` или присоединяется к уже выполняющемуся вызову с тем же ключом.
+        Отмена одного ожидающего не отменяет запрос для остальных.
+        :param key: Ключ запроса.
+        :param func: Функция, выполняющая запрос.
+        :return: Результат запроса.
+        """
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._forget(key, future))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key: ty.Hashable, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        # Исключение получают ожидающие; если их не осталось, не ругаемся в лог
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики вызовов.
+        """
+        return dict(
+            calls=self.calls,
+            coalesced=self.coalesced,
+            in_flight=len(self._in_flight),
+        )
@@ -12,6 +12,9 @@ from aiogram.types import ChatMemberStatus
 from loguru import logger
 
 from services.remove_message import delete_message
+from utils import metrics
+from utils.logger import trace_enabled
+from utils.ttl_cache import TTLCache
 
 if ty.TYPE_CHECKING:
     from aiogram.types import (
@@ -20,11 +23,31 @@ if ty.TYPE_CHECKING:
         ChatMemberAdministrator,
         ChatMemberOwner,
     )
+    from models.config import Config
 
     T = ty.TypeVar("T")
     P = ty.ParamSpec("P")
 
 
+# Администраторы чатов, общие для всех проверок прав.
+# Сбрасываются при изменении статуса участника (handlers/chat_members.py)
+chat_admins_cache: TTLCache[
+    int, list[ChatMemberOwner | ChatMemberAdministrator]
+] = TTLCache(maxsize=10000, ttl=60)
+metrics.register("chat_admins_cache", chat_admins_cache.stats)
+
+
+def setup(config: Config) -> None:
+    chat_admins_cache.configure(ttl=config.chat_admins_cache_ttl)
+
+
+def invalidate_chat_admins(chat_id: int) -> None:
+    """
+    Удаляет администраторов чата из кэша.
+    """
+    chat_admins_cache.pop(chat_id)
+
+
 class Permission(Enum):
     CAN_POST_MESSAGES = "can_post_messages"
     CAN_EDIT_MESSAGES = "can_edit_messages"
@@ -54,6 +77,13 @@ class HasPermissions(ABC):
         """
         self.permissions = permissions
         self.on_no_access = on_no_access
+        # Шаблон TRACE сообщения собирается один раз и не содержит разметки:
+        # loguru разбирает теги при каждом вызове с colors=True
+        self._trace_template = (
+            f"<{self.__class__.__name__}> checks permissions ("
+            + ", ".join(permission.value for permission in permissions)
+            + ") at the user {target_id}."
+        )
         if on_no_access == "default":
             self.on_no_access: ty.Callable[
                 [Message], ty.Awaitable[ty.Any]
@@ -62,21 +92,17 @@ class HasPermissions(ABC):
     def __call__(
         self, func: ty.Callable[..., ty.Awaitable[T]]
     ) -> ty.Callable[ty.Concatenate[Message, P], ty.Awaitable[T]]:
+        func_args = getfullargspec(func).args
+
         async def _wrapper(message: Message, **kwargs: P.kwargs) -> Awaitable[T] | None:
-            logger.opt(colors=True).trace(
-                r"\<{class_name}> checks permissions ({permissions}) "
-                "at the user <y>{target_id}</y>.".format(
-                    class_name=self.__class__.__name__,
-                    permissions=", ".join(
-                        f"<c>{permission.value}</c>" for permission in self.permissions
-                    ),
-                    target_id=self.get_target_id(message),
-                )
-            )
+            if trace_enabled():
+                target_id = self.get_target_id(message)
+                logger.trace(self._trace_template, target_id=target_id)
             if await self.check_permissions(message):
-                logger.trace("All permissions granted")
+                if trace_enabled():
+                    logger.trace("All permissions granted")
                 kwargs.update({"message": message})
-                return await func(*[kwargs[arg] for arg in getfullargspec(func).args])
+                return await func(*[kwargs[arg] for arg in func_args])
             if self.on_no_access is not None:
                 await self.on_no_access(message)
                 raise CancelHandler()
@@ -91,9 +117,8 @@ class HasPermissions(ABC):
             return True
         for permission in self.permissions:
             if not getattr(chat_member, permission.value):
-                logger.opt(colors=True).trace(
-                    "Тo access to <c>{}</c>", permission.value
-                )
+                if trace_enabled():
+                    logger.trace("Тo access to {}", permission.value)
                 return False
         return True
 
@@ -109,7 +134,10 @@ class HasPermissions(ABC):
     ) -> list[ChatMemberOwner | ChatMemberAdministrator] | None:
         with suppress(KeyError):
             return message.conf[self.ADMINS_PAYLOAD_ARGUMENT_NAME]
-        admins = await message.chat.get_administrators()
+        admins = chat_admins_cache.get(message.chat.id)
+        if admins is None:
+            admins = await message.chat.get_administrators()
+            chat_admins_cache.set(message.chat.id, admins)
         message.conf[self.ADMINS_PAYLOAD_ARGUMENT_NAME] = admins
         return admins
 
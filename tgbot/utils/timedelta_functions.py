@@ -6,15 +6,12 @@
 
 from __future__ import annotations
 
-import re
 import typing as ty
 from datetime import timedelta
+from functools import lru_cache
 
 from utils.exceptions import ToLongDuration, InvalidFormatDuration
 
-if ty.TYPE_CHECKING:
-    from re import Match
-
 MODIFIERS = {
     ("y", "year", "years", "г", "год", "лет"): timedelta(
         days=365
@@ -29,74 +26,94 @@ MODIFIERS = {
         seconds=1
     ),
 }
-ALL_MODIFIER = "|".join("|".join(_) for _ in MODIFIERS.keys())
-PATTERN = re.compile(rf"(?P<value>\d+)\s?(?P<modifier>{ALL_MODIFIER})")
-LINE_PATTERN = re.compile(rf"^(\d+\s?({ALL_MODIFIER})\s?)+$")
-
-
-def _get_modifier_value(modifier: str) -> timedelta:
-    for modifiers_group in MODIFIERS:
-        if modifier in modifiers_group:
-            return MODIFIERS[modifiers_group]
+# Указатель времени -> временной отрезок
+UNITS: dict[str, timedelta] = {
+    modifier: value for modifiers, value in MODIFIERS.items() for modifier in modifiers
+}
+MIN_DURATION = timedelta(seconds=30)
+MAX_ERRORS = 3  # Кол-во некорректных аргументов подряд, после которого разбор прекращается
 
 
-def parse_timedelta(value: str) -> tuple[timedelta, Match]:
+@lru_cache(maxsize=1024)
+def _parse_token(token: str) -> tuple[int | timedelta, ...] | None:
+    """
+    Разбивает аргумент на чередующиеся числа и указатели времени.
+    Например, "1ч30м" -> (1, 1 час, 30, 1 минута).
+    :return: Части аргумента или None, если в нем есть неизвестный указатель.
+    """
+    parts: list[int | timedelta] = []
+    start = 0
+    for i in range(1, len(token) + 1):
+        if i < len(token) and token[i].isdecimal() == token[start].isdecimal():
+            continue
+        part = token[start:i]
+        if part.isdecimal():
+            parts.append(int(part))
+        elif (unit := UNITS.get(part)) is not None:
+            parts.append(unit)
+        else:
+            return None
+        start = i
+    return tuple(parts)
+
+
+def parse_timedelta_from_args(args: ty.Iterable[str]) -> tuple[timedelta, int]:
     """
-    Парсинг временного отрезка.
-    :param value: Строка.
-    :return: Временной отрезок и заданная строка.
+    Гибкий парсинг временного отрезка из аргументов команды за один проход.
+    Число и указатель времени могут быть записаны слитно или раздельно: "1ч 30 м".
+    Разбор прекращается после трех некорректных аргументов подряд.
+    :param args: Аргументы команды.
+    :return: Временной отрезок и кол-во использованных аргументов.
     """
-    # Подходит ли данная строка под шаблон временного отрезка
-    match = LINE_PATTERN.match(value)
-    if not match:
-        raise InvalidFormatDuration(f"Некорректный формат времени: {value}")
+    result = timedelta()
+    consumed = 0  # Кол-во аргументов в последнем корректном отрезке
+    pending: list[tuple[int, timedelta]] = []  # Части, еще не вошедшие в корректный отрезок
+    value: int | None = None  # Число, ожидающее указатель времени
+    errors = 0
+
+    for index, arg in enumerate(args, 1):
+        parts = _parse_token(arg)
+        # Аргумент должен начинаться с указателя, только если перед ним было число
+        if not parts or isinstance(parts[0], int) == (value is not None):
+            break
+
+        for part in parts:
+            if isinstance(part, int):
+                value = part
+            else:
+                pending.append((value, part))
+                value = None
 
-    try:
-        result = timedelta()
-        for match in PATTERN.finditer(value):  # Парсинг всех указателей времени
-            value, modifier = match.groups()
+        if value is not None:  # Число без указателя
+            errors += 1
+            if errors == MAX_ERRORS:
+                break
+            continue
 
-            result += int(value) * _get_modifier_value(modifier)
-    except OverflowError as e:
-        raise ToLongDuration("Временной отрезок слишком большой", origin_exception=e)
+        try:
+            for amount, unit in pending:
+                result += amount * unit
+        except OverflowError as e:
+            raise ToLongDuration("Временной отрезок слишком большой", origin_exception=e)
+        pending.clear()
+        consumed = index
+        errors = 0
+
+    if not consumed:  # Если в итоге не получилось найти время
+        raise InvalidFormatDuration
 
-    return result, match
+    return max(result, MIN_DURATION), consumed
 
 
-def parse_timedelta_from_text(
-    text_duration: str,
-) -> tuple[timedelta, Match] | None:
+def parse_timedelta_from_text(text_duration: str) -> tuple[timedelta, int] | None:
     """
     Гибкий парсинг временного отрезка их строки, введенной пользователем.
     :param text_duration: Данные от пользователя.
+    :return: Временной отрезок и кол-во использованных слов.
     """
     if not text_duration:
         return None
-
-    # Разбираем текст на аргументы
-    args = text_duration.split()
-    current_line = ""
-    last = None
-    errors = 0
-
-    # Добавляем к строке следующую часть и пробудем парсить из нее время
-    for arg in args:
-        current_line += " " + arg
-        try:
-            last = parse_timedelta(current_line.strip())
-            errors = 0
-        except InvalidFormatDuration:
-            errors += 1
-            if errors == 3:  # Если возникло 3 ошибки подряд
-                break
-
-    if last is None:  # Если в итоге не получилось найти время
-        raise InvalidFormatDuration
-
-    duration, match = last
-    if duration <= timedelta(seconds=30):  # Минимальный временной отрезок
-        return timedelta(seconds=30), match
-    return duration, match
+    return parse_timedelta_from_args(text_duration.split())
 
 
 def format_timedelta(td: timedelta) -> str:
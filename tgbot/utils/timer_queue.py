@@ -0,0 +1,144 @@
+"""
+
+Отложенные действия.
+Все таймеры хранятся в одной куче и обслуживаются одной фоновой задачей,
+поэтому ожидание не занимает отдельную задачу на каждое действие.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+import typing as ty
+
+from loguru import logger
+
+from utils import metrics
+
+if ty.TYPE_CHECKING:
+    from aiogram import Dispatcher
+
+Callback = ty.Callable[[], ty.Awaitable[ty.Any]]
+
+
+class _Timer(ty.NamedTuple):
+    when: float
+    seq: int
+    callback: Callback
+
+
+class TimerQueue:
+    """
+    Очередь таймеров по ключам.
+    У ключа может быть только один таймер, повторная установка заменяет его.
+    """
+
+    def __init__(self):
+        self.scheduled = 0
+        self.fired = 0
+        self.failed = 0
+
+        # Куча (время срабатывания, номер, ключ).
+        # Замененные и отмененные таймеры удаляются из кучи при извлечении
+        self._heap: list[tuple[float, int, ty.Hashable]] = []
+        self._timers: dict[ty.Hashable, _Timer] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+    def schedule(self, key: ty.Hashable, delay: float, callback: Callback) -> None:
+        """
+        Устанавливает таймер.
+        :param key: Ключ таймера.
+        :param delay: Через сколько секунд выполнить действие.
+        :param callback: Асинхронная функция без аргументов.
+        """
+        timer = _Timer(time.monotonic() + delay, next(self._seq), callback)
+        self._timers[key] = timer
+        heapq.heappush(self._heap, (timer.when, timer.seq, key))
+        self.scheduled += 1
+        if self._heap[0][1] == timer.seq:
+            # Новый таймер сработает раньше остальных
+            self._wakeup.set()
+
+    def cancel(self, key: ty.Hashable) -> None:
+        self._timers.pop(key, None)
+
+    def _pop_due(self, now: float) -> list[Callback]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, key = heapq.heappop(self._heap)
+            timer = self._timers.get(key)
+            if timer is not None and timer.seq == seq:
+                del self._timers[key]
+                due.append(timer.callback)
+        return due
+
+    def _next_delay(self) -> float | None:
+        # Пропускаем замененные и отмененные таймеры в начале кучи
+        while self._heap:
+            _, seq, key = self._heap[0]
+            timer = self._timers.get(key)
+            if timer is not None and timer.seq == seq:
+                return max(timer.when - time.monotonic(), 0)
+            heapq.heappop(self._heap)
+        return None
+
+    async def _call(self, callback: Callback) -> None:
+        try:
+            await callback()
+        except Exception as e:
+            self.failed += 1
+            logger.exception(e)
+        else:
+            self.fired += 1
+
+    def _fire(self, callbacks: list[Callback]) -> None:
+        for callback in callbacks:
+            task = asyncio.create_task(self._call(callback))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_delay())
+            except asyncio.TimeoutError:
+                pass
+            self._fire(self._pop_due(time.monotonic()))
+
+    async def on_startup(self, _: Dispatcher) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def on_shutdown(self, _: Dispatcher) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        # Выполняем оставшиеся действия, не дожидаясь их времени
+        self._fire(self._pop_due(float("inf")))
+        if self._running:
+            await asyncio.gather(*self._running)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики таймеров.
+        """
+        return dict(
+            pending=len(self._timers),
+            scheduled=self.scheduled,
+            fired=self.fired,
+            failed=self.failed,
+        )
+
+
+timers = TimerQueue()
+metrics.register("timers", timers.stats)
@@ -0,0 +1,113 @@
+"""
+
+Кэш с ограничением по размеру и времени жизни записей.
+Используется для записей бд и ответов Bot API, которые запрашиваются
+на каждое событие и редко меняются.
+
+"""
+
+from __future__ import annotations
+
+import time
+import typing as ty
+from collections import OrderedDict
+
+K = ty.TypeVar("K")
+V = ty.TypeVar("V")
+
+
+class TTLCache(ty.Generic[K, V]):
+    """
+    LRU кэш с ограничением по размеру и времени жизни записей.
+    Ведет счетчики попаданий и промахов.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        """
+        :param maxsize: Максимальное кол-во записей.
+        :param ttl: Время жизни записи в секундах.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def configure(self, maxsize: int | None = None, ttl: float | None = None) -> None:
+        """
+        Изменение ограничений кэша.
+        :param maxsize: Максимальное кол-во записей.
+        :param ttl: Время жизни записи в секундах.
+        """
+        if maxsize is not None:
+            self.maxsize = maxsize
+            self._trim()
+        if ttl is not None:
+            self.ttl = ttl
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """
+        :return: Значение из кэша или `default`, если записи нет или она устарела.
+        """
+        try:
+            expires_at, value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """
+        Сохраняет значение в кэш.
+        Если кэш переполнен, удаляются самые давно использованные записи.
+        """
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        self._trim()
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        """
+        Удаляет запись из кэша.
+        :return: Удаленное значение или `default`.
+        """
+        try:
+            return self._data.pop(key)[1]
+        except KeyError:
+            return default
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        :return: Счетчики кэша.
+        """
+        total = self.hits + self.misses
+        return dict(
+            size=len(self._data),
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=round(self.hits / total, 4) if total else 0.0,
+        )
+
+    def _trim(self) -> None:
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: K) -> bool:
+        try:
+            expires_at, _ = self._data[key]
+        except KeyError:
+            return False
+        return expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,359 @@
+"""
+
+Планировщик событий.
+События одного чата обрабатываются по очереди в порядке получения,
+а чаты обслуживаются по кругу, поэтому один активный чат
+не задерживает остальные. Кол-во одновременно обрабатываемых событий
+ограничено кол-вом задач-обработчиков.
+Чаты, первое событие которых имеет более высокий приоритет (utils.priority),
+обслуживаются раньше, а события низкого приоритета, ждавшие дольше порога,
+отбрасываются.
+При вебхуке телеграм получает ответ сразу после добавления события в очередь,
+а при polling события, не поместившиеся в очередь, отбрасываются.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import typing as ty
+from collections import deque
+from enum import Enum
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.dispatcher.webhook import WebhookRequestHandler
+from aiohttp import web
+from loguru import logger
+
+from utils import metrics
+from utils.command_index import IndexedDispatcher
+from utils.priority import Priority, get_update_priority
+
+# Ответ на отброшенную из-за нагрузки команду
+SHED_REPLY_TEXT = "Бот перегружен, попробуйте позже"
+
+
+def get_chat_id(update: types.Update) -> int:
+    """
+    :param update: Событие.
+    :return: Id чата события или id пользователя, если чата у события нет.
+    """
+    for key, event in update.values.items():
+        if key == "update_id" or not isinstance(event, types.base.TelegramObject):
+            continue
+        message = event.values.get("message")
+        if chat := event.values.get("chat") or (message and message.chat):
+            return chat.id
+        if user := event.values.get("from") or event.values.get("user"):
+            return user.id
+    return 0
+
+
+class QueueState(Enum):
+    """
+    Состояние очереди при добавлении события.
+    """
+
+    accepted = "accepted"  # Событие добавлено
+    busy = "busy"  # Очередь заполнена выше порога, телеграм должен повторить позже
+    unavailable = "unavailable"  # Очередь переполнена или не запущена
+
+
+class _Entry(ty.NamedTuple):
+    """
+    Событие в очереди чата.
+    """
+
+    update: types.Update
+    priority: Priority
+    silent: bool  # Отбрасывать без ответа пользователю
+    enqueued_at: float
+
+
+class UpdateQueue:
+    """
+    Очереди событий по чатам с пулом задач-обработчиков.
+    Чат, события которого сейчас обрабатываются, не выдается другим задачам,
+    а после обработки события встает в конец очереди чатов своего приоритета.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        high_water: int = 800,
+        workers: int = 16,
+        low_priority_max_delay: float = 5.0,
+    ):
+        """
+        :param max_size: Максимальное кол-во событий в очереди.
+        :param high_water: Кол-во событий, после которого события не принимаются.
+        :param workers: Кол-во задач-обработчиков.
+        :param low_priority_max_delay: Сколько секунд событие низкого приоритета
+            может ждать обработки. 0 - события не отбрасываются.
+        """
+        self.max_size = max_size
+        self.high_water = high_water
+        self.workers = workers
+        self.low_priority_max_delay = low_priority_max_delay
+
+        self.accepted = 0
+        self.rejected_busy = 0
+        self.rejected_unavailable = 0
+        self.processed = 0
+        self.failed = 0
+        self.shed = 0
+
+        self._size = 0
+        # Не обработанные события каждого чата
+        self._chats: dict[int, deque[_Entry]] = {}
+        # Чаты, ожидающие задачу-обработчик: (приоритет, порядковый номер, id чата)
+        self._ready: asyncio.PriorityQueue[tuple[int, int, int]] | None = None
+        self._counter = itertools.count()
+        self._dispatcher: Dispatcher | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._closed = True
+        # Устанавливается, когда кол-во событий опускается ниже порога
+        self._room = asyncio.Event()
+
+    def configure(
+        self,
+        max_size: int,
+        high_water: int,
+        workers: int,
+        low_priority_max_delay: float,
+    ) -> None:
+        self.max_size = max_size
+        self.high_water = high_water
+        self.workers = workers
+        self.low_priority_max_delay = low_priority_max_delay
+
+    @property
+    def running(self) -> bool:
+        return not self._closed
+
+    def put(self, update: types.Update) -> QueueState:
+        """
+        Добавляет событие в очередь, не дожидаясь обработки.
+        Событие, которое не принято, телеграм должен отправить повторно.
+        :param update: Событие.
+        :return: Состояние очереди.
+        """
+        if self._closed or self._size >= self.max_size:
+            self.rejected_unavailable += 1
+            return QueueState.unavailable
+        if self._size >= self.high_water:
+            self.rejected_busy += 1
+            return QueueState.busy
+
+        self._append(update, *get_update_priority(self._dispatcher, update))
+        return QueueState.accepted
+
+    async def put_or_shed(self, update: types.Update) -> QueueState:
+        """
+        Добавляет событие, которое телеграм уже считает полученным (polling).
+        Выше порога отбрасываются события низкого приоритета,
+        а в переполненной очереди - все события.
+        :param update: Событие.
+        :return: Состояние очереди.
+        """
+        if self._closed:
+            self.rejected_unavailable += 1
+            return QueueState.unavailable
+
+        level, silent = get_update_priority(self._dispatcher, update)
+        if self._size >= self.max_size or (
+            self._size >= self.high_water and level >= Priority.low
+        ):
+            now = asyncio.get_running_loop().time()
+            await self._shed(_Entry(update, level, silent, now))
+            return (
+                QueueState.unavailable
+                if self._size >= self.max_size
+                else QueueState.busy
+            )
+
+        self._append(update, level, silent)
+        return QueueState.accepted
+
+    async def put_wait(self, update: types.Update) -> QueueState:
+        """
+        Добавляет событие, дожидаясь, пока кол-во событий опустится ниже порога.
+        Для источников, которые можно приостановить (utils.workers).
+        :param update: Событие.
+        :return: Состояние очереди.
+        """
+        while not self._closed and self._size >= self.high_water:
+            self._room.clear()
+            await self._room.wait()
+        if self._closed:
+            self.rejected_unavailable += 1
+            return QueueState.unavailable
+
+        self._append(update, *get_update_priority(self._dispatcher, update))
+        return QueueState.accepted
+
+    def _append(self, update: types.Update, level: Priority, silent: bool) -> None:
+        entry = _Entry(update, level, silent, asyncio.get_running_loop().time())
+
+        chat_id = get_chat_id(update)
+        if (updates := self._chats.get(chat_id)) is not None:
+            updates.append(entry)
+        else:
+            self._chats[chat_id] = deque((entry,))
+            self._schedule(chat_id, entry)
+
+        self._size += 1
+        self.accepted += 1
+
+    def _schedule(self, chat_id: int, head: _Entry) -> None:
+        """
+        Ставит чат в очередь по приоритету его первого события.
+        """
+        self._ready.put_nowait((head.priority, next(self._counter), chat_id))
+
+    def _is_stale(self, entry: _Entry) -> bool:
+        """
+        :return: Событие низкого приоритета ждало дольше допустимого.
+        """
+        return (
+            entry.priority >= Priority.low
+            and self.low_priority_max_delay > 0
+            and asyncio.get_running_loop().time() - entry.enqueued_at
+            > self.low_priority_max_delay
+        )
+
+    async def _shed(self, entry: _Entry) -> None:
+        self.shed += 1
+        logger.debug("Update {id} shed under load", id=entry.update.update_id)
+        if not entry.silent and (message := entry.update.message):
+            await message.reply(SHED_REPLY_TEXT)
+
+    async def _work(
+        self,
+        ready: asyncio.PriorityQueue[tuple[int, int, int]],
+        dispatcher: Dispatcher,
+    ) -> None:
+        Dispatcher.set_current(dispatcher)
+        Bot.set_current(dispatcher.bot)
+        while True:
+            *_, chat_id = await ready.get()
+            updates = self._chats[chat_id]
+            entry = updates.popleft()
+            self._size -= 1
+            if self._size < self.high_water:
+                self._room.set()
+            try:
+                if self._is_stale(entry):
+                    await self._shed(entry)
+                    continue
+                # aiogram хранит текущие Update, Message, Chat и User
+                # в контекстных переменных, поэтому каждое событие
+                # обрабатывается в своей задаче со своей копией контекста
+                await asyncio.create_task(
+                    dispatcher.updates_handler.notify(entry.update)
+                )
+            except Exception as e:
+                # Ошибку уже не вернуть телеграму
+                self.failed += 1
+                logger.exception(e)
+            else:
+                self.processed += 1
+            finally:
+                # Чат с оставшимися событиями ждет своей очереди после других чатов
+                if updates:
+                    self._schedule(chat_id, updates[0])
+                else:
+                    del self._chats[chat_id]
+                ready.task_done()
+
+    async def on_startup(self, dispatcher: Dispatcher) -> None:
+        self._dispatcher = dispatcher
+        self._ready = asyncio.PriorityQueue()
+        self._tasks = [
+            asyncio.create_task(self._work(self._ready, dispatcher))
+            for _ in range(self.workers)
+        ]
+        self._closed = False
+
+    async def on_shutdown(self, dispatcher: Dispatcher) -> None:
+        # Новые события не принимаются, уже принятые обрабатываются
+        dispatcher.stop_polling()
+        self._closed = True
+        self._room.set()
+        if self._ready is not None:
+            await self._ready.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики очереди.
+        """
+        return dict(
+            queue_size=self._size,
+            chats=len(self._chats),
+            accepted=self.accepted,
+            rejected_busy=self.rejected_busy,
+            rejected_unavailable=self.rejected_unavailable,
+            processed=self.processed,
+            failed=self.failed,
+            shed=self.shed,
+        )
+
+
+update_queue = UpdateQueue()
+metrics.register("update_queue", update_queue.stats)
+
+
+class SchedulingDispatcher(IndexedDispatcher):
+    """
+    Диспетчер, передающий события планировщику
+    вместо создания задачи на каждое событие.
+    До запуска планировщика события обрабатываются как обычно.
+    """
+
+    async def process_updates(self, updates, fast: bool = True):
+        if not update_queue.running:
+            return await super(SchedulingDispatcher, self).process_updates(
+                updates, fast
+            )
+
+        # Telegram уже считает события полученными и не отправит их повторно,
+        # поэтому при переполнении очереди события отбрасываются
+        for update in updates:
+            await update_queue.put_or_shed(update)
+        return []
+
+    async def feed_updates(self, updates: list[types.Update]) -> None:
+        """
+        Передает события планировщику, дожидаясь места в очереди.
+        Используется процессами-обработчиками (utils.workers),
+        поток событий которых можно приостановить, поэтому события не отбрасываются.
+        """
+        if not update_queue.running:
+            await super(SchedulingDispatcher, self).process_updates(updates, True)
+            return
+        for update in updates:
+            await update_queue.put_wait(update)
+
+
+class QueuedWebhookRequestHandler(WebhookRequestHandler):
+    """
+    Обработчик вебхука, который только добавляет событие в очередь.
+    Если очередь заполнена, телеграм получает 429 или 503 и повторит отправку позже.
+    """
+
+    async def post(self) -> web.Response:
+        self.validate_ip()
+        dispatcher = self.get_dispatcher()
+        update = await self.parse_update(dispatcher.bot)
+
+        state = update_queue.put(update)
+        if state == QueueState.busy:
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        if state == QueueState.unavailable:
+            return web.Response(status=503, headers={"Retry-After": "1"})
+        return web.Response(text="ok")
@@ -0,0 +1,465 @@
+"""
+
+Запуск бота в нескольких процессах.
+При polling главный процесс получает события
+и распределяет их по процессам-обработчикам по id чата,
+поэтому события одного чата всегда обрабатывает один процесс.
+Очереди событий хранит главный процесс, а процессы-обработчики
+забирают события пачками через свой канал (Pipe),
+поэтому события упавшего процесса получит перезапущенный.
+Если очередь процесса заполнена, главный процесс перестает получать
+события, пока процесс ее не разгрузит: полученные события не отбрасываются.
+При вебхуке процессы слушают один порт (SO_REUSEPORT),
+а вебхук регистрирует только первый из них.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import multiprocessing
+import signal
+import socket
+import time
+import typing as ty
+from abc import ABC, abstractmethod
+from collections import deque
+from multiprocessing.connection import wait
+
+from aiogram import Bot, types
+from aiogram.bot import api
+from aiogram.utils.payload import generate_payload, prepare_arg
+from loguru import logger
+
+from utils import metrics
+
+if ty.TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.context import SpawnProcess
+
+    from models.config import Config
+    from utils.update_queue import SchedulingDispatcher
+
+# Кол-во событий, передаваемых диспетчеру за раз
+BATCH_SIZE = 100
+# Как часто проверяется, что процессы-обработчики живы (в секундах)
+WATCH_INTERVAL = 1
+# Сколько ждать завершения процесса-обработчика при остановке (в секундах)
+STOP_TIMEOUT = 30
+# Как долго ждать запросов процессов-обработчиков за раз (в секундах)
+POLL_INTERVAL = 0.5
+
+
+def get_update_chat_id(update: dict[str, ty.Any]) -> int:
+    """
+    :param update: Событие в формате Bot API.
+    :return: Id чата события или id пользователя, если чата у события нет.
+    """
+    for key, value in update.items():
+        if key == "update_id" or not isinstance(value, dict):
+            continue
+        if chat := value.get("chat") or (value.get("message") or {}).get("chat"):
+            return chat["id"]
+        if user := value.get("from") or value.get("user"):
+            return user["id"]
+    return 0
+
+
+def _handle_signals() -> None:
+    """
+    Остановкой процессов управляет главный процесс:
+    Ctrl+C игнорируется, а SIGTERM завершает процесс так же, как Ctrl+C.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+
+def _worker_main(index: int, conn: Connection, config: Config) -> None:
+    """
+    Точка входа процесса-обработчика.
+    Процесс настраивает свой диспетчер, middlewares и подключения к бд
+    и обрабатывает события из канала до получения None.
+    """
+    _handle_signals()
+
+    import misc
+    from utils.executor import runner
+
+    misc.setup(config)
+    logger.info("Worker {index} started", index=index)
+    runner.start(_consume(conn, misc.dp))
+
+
+def _listener_main(index: int, config: Config) -> None:
+    """
+    Точка входа процесса, принимающего вебхук.
+    """
+    _handle_signals()
+
+    import misc
+    from utils.executor import runner
+    from utils.update_queue import QueuedWebhookRequestHandler
+
+    # Вебхук регистрирует только первый процесс
+    webhook = dataclasses.replace(config.webhook, register_webhook=index == 0)
+    config = dataclasses.replace(config, webhook=webhook)
+
+    misc.setup(config)
+    logger.info("Webhook listener {index} started", index=index)
+    runner.start_webhook(
+        request_handler=QueuedWebhookRequestHandler,
+        reuse_port=True,
+        handle_signals=False,
+        **config.webhook.listener_kwargs,
+    )
+
+
+async def _consume(conn: Connection, dp: SchedulingDispatcher) -> None:
+    loop = asyncio.get_running_loop()
+
+    while True:
+        # Запрашиваем следующую пачку событий
+        conn.send(True)
+        try:
+            data = await loop.run_in_executor(None, conn.recv)
+        except EOFError:  # Главный процесс завершился
+            break
+        if data is None:
+            break
+
+        # Следующая пачка запрашивается, только когда эта поместилась
+        # в очередь планировщика. Пока процесс занят, события копятся
+        # в ограниченной очереди главного процесса
+        batch = [types.Update.to_object(update) for update in data]
+        await dp.feed_updates(batch)
+
+
+class ProcessPool(ABC):
+    """
+    Процессы бота. Упавшие процессы перезапускаются.
+    """
+
+    def __init__(self, config: Config, workers: int):
+        """
+        :param config: Текущая конфигурация.
+        :param workers: Кол-во процессов.
+        """
+        self.config = config
+        self.workers = workers
+        self.restarts = 0
+
+        # spawn работает одинаково на всех платформах
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[SpawnProcess | None] = [None] * workers
+
+    @abstractmethod
+    def _process_args(self, index: int) -> tuple[ty.Callable[..., None], tuple]:
+        """
+        :return: Точка входа процесса и ее аргументы.
+        """
+        raise NotImplementedError
+
+    def _spawn(self, index: int) -> SpawnProcess:
+        target, args = self._process_args(index)
+        process = self._context.Process(
+            target=target, args=args, name=f"tgbot-worker-{index}"
+        )
+        process.start()
+        self._processes[index] = process
+        return process
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self._spawn(index)
+
+    async def watch(self) -> None:
+        """
+        Перезапускает завершившиеся процессы.
+        """
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            for index, process in enumerate(self._processes):
+                if process is not None and process.exitcode is not None:
+                    logger.warning(
+                        "Worker {index} exited with code {code}, restarting",
+                        index=index,
+                        code=process.exitcode,
+                    )
+                    self.restarts += 1
+                    self._spawn(index)
+
+    def _request_stop(self) -> None:
+        """
+        Просит процессы завершиться.
+        """
+        for process in self._processes:
+            if process is not None and process.exitcode is None:
+                process.terminate()
+
+    def stop(self) -> None:
+        """
+        Останавливает процессы, давая им завершить работу.
+        """
+        self._request_stop()
+        for process in self._processes:
+            if process is None:
+                continue
+            process.join(STOP_TIMEOUT)
+            if process.exitcode is None:
+                process.kill()
+                process.join()
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики процессов.
+        """
+        return dict(workers=self.workers, restarts=self.restarts)
+
+
+class WorkerPool(ProcessPool):
+    """
+    Процессы-обработчики событий, полученных через polling.
+    События каждого процесса копятся в ограниченной очереди главного процесса.
+    Процесс запрашивает следующую пачку через свой канал, когда обработал предыдущую.
+    При перезапуске процесс получает новый канал, а очередь сохраняется.
+    """
+
+    def __init__(self, config: Config, workers: int):
+        super(WorkerPool, self).__init__(config, workers)
+        self.queue_size = config.updates_queue_size
+        self.dispatched = [0] * workers
+        self.full_waits = 0  # Сколько раз polling ждал разгрузки очереди
+
+        self._queues: list[deque[dict[str, ty.Any]]] = [
+            deque() for _ in range(workers)
+        ]
+        self._conns: list[Connection | None] = [None] * workers
+        self._child_conns: list[Connection | None] = [None] * workers
+        # Процесс запросил события, но его очередь была пуста
+        self._waiting = [False] * workers
+        # Процессу отправлен None при остановке
+        self._finished = [False] * workers
+        # Устанавливается, когда процесс забрал пачку из своей очереди
+        self._drained = [asyncio.Event() for _ in range(workers)]
+
+    def _process_args(self, index: int) -> tuple[ty.Callable[..., None], tuple]:
+        # Новый канал для каждого запуска: упавший процесс мог оставить
+        # в старом канале недочитанные данные
+        conn, child_conn = self._context.Pipe()
+        self._conns[index] = conn
+        self._child_conns[index] = child_conn
+        self._waiting[index] = False
+        self._finished[index] = False
+        return _worker_main, (index, child_conn, self.config)
+
+    def _spawn(self, index: int) -> SpawnProcess:
+        old_conn = self._conns[index]
+        process = super(WorkerPool, self)._spawn(index)
+        # Конец канала процесса нужен только ему,
+        # иначе после его падения канал не закроется
+        self._child_conns[index].close()
+        self._child_conns[index] = None
+        if old_conn is not None:
+            old_conn.close()
+        return process
+
+    async def dispatch(self, update: dict[str, ty.Any]) -> None:
+        """
+        Передает событие процессу, отвечающему за его чат.
+        Если очередь процесса заполнена, ждет, пока процесс ее разгрузит.
+        """
+        index = get_update_chat_id(update) % self.workers
+        queue = self._queues[index]
+        if len(queue) >= self.queue_size:
+            self.full_waits += 1
+            logger.warning("Worker {index} queue is full, waiting", index=index)
+            while len(queue) >= self.queue_size:
+                self._drained[index].clear()
+                await self._drained[index].wait()
+
+        queue.append(update)
+        self.dispatched[index] += 1
+        if self._waiting[index]:
+            self._send(index)
+
+    def _send(self, index: int, stop: bool = False) -> None:
+        """
+        Отвечает на запрос процесса пачкой событий.
+        Если событий нет, ответ откладывается до следующего события,
+        а при остановке процессу отправляется None.
+        """
+        queue = self._queues[index]
+        if not queue and not stop:
+            self._waiting[index] = True
+            return
+
+        batch = [queue.popleft() for _ in range(min(BATCH_SIZE, len(queue)))]
+        try:
+            self._conns[index].send(batch or None)
+        except OSError:
+            # Процесс упал, события получит перезапущенный процесс
+            queue.extendleft(reversed(batch))
+            return
+        self._waiting[index] = False
+        self._finished[index] = not batch
+        if batch:
+            self._drained[index].set()
+
+    def _receive(self, conns: list[Connection], stop: bool = False) -> None:
+        """
+        Обрабатывает запросы процессов, готовые для чтения.
+        """
+        for index, conn in enumerate(self._conns):
+            if conn not in conns or conn.closed:
+                continue
+            try:
+                conn.recv()
+            except (EOFError, OSError):
+                # Процесс упал, его перезапустит `watch`
+                conn.close()
+                continue
+            self._send(index, stop)
+
+    async def serve(self) -> None:
+        """
+        Отвечает на запросы процессов-обработчиков.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            conns = [c for c in self._conns if c is not None and not c.closed]
+            try:
+                ready = await loop.run_in_executor(None, wait, conns, POLL_INTERVAL)
+            except (OSError, ValueError):
+                continue  # Канал закрыли при перезапуске процесса
+            self._receive(ready)
+
+    def _request_stop(self) -> None:
+        # Процессы получают оставшиеся события, а затем None
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for index, process in enumerate(self._processes):
+            if process is None or process.exitcode is not None:
+                continue
+            if self._waiting[index]:
+                self._send(index, stop=True)
+
+        while time.monotonic() < deadline:
+            conns = [
+                conn
+                for index, conn in enumerate(self._conns)
+                if not (self._finished[index] or conn.closed)
+                and self._processes[index].exitcode is None
+            ]
+            if not conns:
+                break
+            self._receive(wait(conns, POLL_INTERVAL), stop=True)
+
+    def stats(self) -> dict[str, int]:
+        return dict(
+            super(WorkerPool, self).stats(),
+            queued=sum(len(queue) for queue in self._queues),
+            full_waits=self.full_waits,
+            **{
+                f"dispatched_{index}": count
+                for index, count in enumerate(self.dispatched)
+            },
+        )
+
+
+class ListenerPool(ProcessPool):
+    """
+    Процессы, принимающие вебхук на одном порту.
+    """
+
+    def _process_args(self, index: int) -> tuple[ty.Callable[..., None], tuple]:
+        return _listener_main, (index, self.config)
+
+
+async def _poll(
+    config: Config, pool: WorkerPool, skip_updates: bool = False, timeout: int = 20
+) -> None:
+    bot = Bot(config.bot_token)
+    watcher = asyncio.create_task(pool.watch())
+    server = asyncio.create_task(pool.serve())
+    try:
+        await bot.delete_webhook(drop_pending_updates=skip_updates)
+        logger.info("Polling started with {workers} workers", workers=pool.workers)
+
+        offset = None
+        while True:
+            try:
+                # События не разбираются в объекты: процессы получают их как есть
+                updates = await bot.request(
+                    api.Methods.GET_UPDATES,
+                    generate_payload(
+                        offset=offset,
+                        timeout=timeout,
+                        allowed_updates=prepare_arg(list(config.allowed_updates)),
+                    ),
+                )
+            except Exception as e:
+                logger.exception(e)
+                await asyncio.sleep(5)
+                continue
+
+            # Смещение сдвигается только за переданные процессам события:
+            # при остановке во время ожидания остальные события придут снова
+            for update in updates:
+                await pool.dispatch(update)
+                offset = update["update_id"] + 1
+    finally:
+        watcher.cancel()
+        server.cancel()
+        await (await bot.get_session()).close()
+
+
+def _run_pool(pool: ProcessPool, main: ty.Awaitable[None]) -> None:
+    """
+    Запускает процессы и `main` в главном процессе до остановки бота.
+    """
+    # SIGTERM останавливает бота так же, как Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    metrics.register("workers", pool.stats)
+    pool.start()
+    try:
+        asyncio.run(main)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        logger.info("Stopping workers...")
+        pool.stop()
+        metrics.log_metrics()
+
+
+def _setup_logger(config: Config) -> None:
+    from utils.logger import setup_stdout_logger
+
+    logger.remove(0)
+    setup_stdout_logger(config)
+
+
+def run(config: Config, workers: int, skip_updates: bool = False) -> None:
+    """
+    Запуск бота в режиме polling с несколькими процессами-обработчиками.
+    :param config: Текущая конфигурация.
+    :param workers: Кол-во процессов-обработчиков.
+    :param skip_updates: Пропустить не обработанные события.
+    """
+    _setup_logger(config)
+    pool = WorkerPool(config, workers)
+    _run_pool(pool, _poll(config, pool, skip_updates))
+
+
+def run_webhook(config: Config, workers: int) -> None:
+    """
+    Запуск бота в режиме вебхука с несколькими процессами,
+    слушающими один порт.
+    :param config: Текущая конфигурация.
+    :param workers: Кол-во процессов.
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("SO_REUSEPORT is not supported on this platform")
+
+    _setup_logger(config)
+    pool = ListenerPool(config, workers)
+    _run_pool(pool, pool.watch())
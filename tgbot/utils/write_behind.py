@@ -0,0 +1,142 @@
+"""
+
+Отложенная запись изменений профилей пользователей и чатов.
+Измененные поля записей накапливаются в буфере и сохраняются пачками
+через `bulk_update` раз в `flush_interval` секунд и при остановке бота.
+Буфер хранит значения полей на момент изменения, а не сами записи,
+поэтому сохраняются только измененные поля каждой записи.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import typing as ty
+
+from loguru import logger
+
+from utils import metrics
+
+if ty.TYPE_CHECKING:
+    from aiogram import Dispatcher
+    from tortoise.models import Model
+
+
+class WriteBehindBuffer:
+    """
+    Буфер измененных полей записей.
+    Повторные изменения одной записи до сброса сохраняются одним запросом.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, batch_size: int = 100):
+        """
+        :param flush_interval: Как часто сохранять изменения (в секундах).
+        :param batch_size: Кол-во записей, сохраняемых за один запрос.
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self.marked = 0
+        self.written = 0
+        self.failed = 0
+
+        # Значения измененных полей по моделям и первичным ключам
+        self._dirty: dict[type[Model], dict[ty.Any, dict[str, ty.Any]]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    def configure(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+
+    def mark_dirty(self, record: Model, fields: ty.Iterable[str]) -> None:
+        """
+        Добавляет запись в буфер.
+        :param record: Сохраненная в бд запись.
+        :param fields: Измененные поля.
+        """
+        values = self._dirty.setdefault(type(record), {}).setdefault(record.pk, {})
+        values.update((field, getattr(record, field)) for field in fields)
+        self.marked += 1
+
+    def discard(self, record: Model, fields: ty.Iterable[str]) -> None:
+        """
+        Убирает из буфера поля, которые уже записаны в бд более новыми значениями.
+        :param record: Запись.
+        :param fields: Записанные поля.
+        """
+        records = self._dirty.get(type(record))
+        if not records or (values := records.get(record.pk)) is None:
+            return
+        for field in fields:
+            values.pop(field, None)
+        if not values:
+            del records[record.pk]
+
+    def pending(self) -> int:
+        return sum(len(records) for records in self._dirty.values())
+
+    async def flush(self) -> None:
+        """
+        Сохраняет все измененные записи.
+        """
+        # Изменения, сделанные во время сохранения, попадут в следующий сброс
+        dirty, self._dirty = self._dirty, {}
+
+        for model, records in dirty.items():
+            # Записи с одинаковым набором измененных полей сохраняются вместе
+            groups: dict[tuple[str, ...], list[Model]] = {}
+            for pk, values in records.items():
+                fields = tuple(sorted(values))
+                groups.setdefault(fields, []).append(
+                    model(**{model._meta.pk_attr: pk}, **values)
+                )
+
+            for fields, objects in groups.items():
+                try:
+                    await model.bulk_update(
+                        objects, fields=fields, batch_size=self.batch_size
+                    )
+                except Exception as e:
+                    self.failed += len(objects)
+                    logger.exception(e)
+                else:
+                    self.written += len(objects)
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def on_startup(self, _: Dispatcher) -> None:
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def on_shutdown(self, _: Dispatcher) -> None:
+        # Даем фоновой задаче завершить текущую запись
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Счетчики буфера.
+        """
+        return dict(
+            pending=self.pending(),
+            marked=self.marked,
+            written=self.written,
+            failed=self.failed,
+        )
+
+
+profile_writer = WriteBehindBuffer()
+metrics.register("profile_writer", profile_writer.stats)